@@ -1,34 +1,49 @@
 import asyncio
 import re
 import time
-import subprocess
-import tempfile
 import wave
-import numpy as np
-import edge_tts
 import speech_recognition as sr
-import requests
 import os
 from datetime import datetime
 import globals
 from globals import BASE_DIR, CONFIG_FILE, LOG_FILE, file_lock, STOP_EVENT
-from difflib import SequenceMatcher
 from system_logs import load_system_config, load_system_logs, SYSTEM_CONFIG, SYSTEM_LOGS
+from tts_cache import TTSCache
+from audio_service import audio_service, OUTPUT_RATE, PRIORITY_TTS
+from earcons import earcon_bank
+from audio_codec import read_wav_pcm
+from tts_backends import TTSRouter, EdgeTTSBackend, PiperBackend, EspeakBackend
+from mic_capture import MicCapture
+from wake_word import wake_word
+from device_registry import registry
+from weather_provider import weather
+from news_poller import news
+from stt_backends import STTRouter, VoskBackend, GoogleSTTBackend
+from llm_stream import LLMStreamer
+from conversation import ConversationMemory
+from llm_cache import LLMResponseCache
+from model_manager import ModelManager
+from intent_classifier import canned_responses
+import metrics
 from gpiozero import OutputDevice
 
 # AI Configuration
 LOCAL_MODEL = "qwen2.5:1.5b"
 MIC_DEVICE_INDEX = 0
 AMP_PIN = 4
-SIMILARITY_THRESHOLD = 0.1
 
 # Voice Configuration
 VOICE_NAME = "vi-VN-HoaiMyNeural"
 TTS_PITCH = '+40Hz'
 TTS_RATE = '+15%'
+TTS_OUTPUT_RATE = OUTPUT_RATE
+TTS_OUTPUT_FORMAT = f"pcm_s16le-{TTS_OUTPUT_RATE}-mono"
+TTS_STREAMING = os.getenv('TTS_STREAMING', '1') == '1'  # play while the TTS backend is still synthesizing
+SENTENCE_LOOKAHEAD = 2        # sentences synthesized and queued ahead of the one playing
+MIN_SENTENCE_CHARS = 12       # shorter fragments are merged into the next sentence
+SENTENCE_GAP_WARN = 0.05      # gaps above this (s) count as audible
 
 # System Configuration
-OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')
 amp = OutputDevice(AMP_PIN, active_high=True, initial_value=False)
 
 # ==========================================
@@ -41,105 +56,347 @@ SYS_INSTRUCT_BASE = (
 )
 
 # ==========================================
-# RSS FEEDS CONFIGURATION
+# FIXED PHRASES (pre-rendered into the TTS cache)
 # ==========================================
-RSS_FEEDS = {
-    "thời sự": "https://vnexpress.net/rss/thoi-su.rss",
-    "thế giới": "https://vnexpress.net/rss/the-gioi.rss",
-    "pháp luật": "https://vnexpress.net/rss/phap-luat.rss",
-    "công nghệ": "https://vnexpress.net/rss/khoa-hoc-cong-nghe.rss",
-    "kinh doanh": "https://vnexpress.net/rss/kinh-doanh.rss"
-}
-
-weather_session = requests.Session()
-
-# ---------- helper to play audio in a thread (blocking) ----------
-def _play_wav_blocking(path):
-    subprocess.run(
-        ['/usr/bin/aplay', '-D', 'plughw:2,0', path],
-        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-    )
-
-def convert_wav_safe(src, dst):
-    subprocess.run(
-        [
-            "/usr/bin/ffmpeg", "-y",
-            "-i", src,
-            "-ac", "1",             # Mono (loa robot thường là mono)
-            "-ar", "44100",         # <--- ĐỔI THÀNH 44100 (Chuẩn nhất)
-            "-acodec", "pcm_s16le", # 16-bit PCM
-            dst
-        ],
-        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-    )
-
-async def speak(text: str):
+GREETING_TEXT = "Hanah khởi động"
+GOODBYE_TEXT = "Bai bai."
+DEVICE_ACK_TEMPLATE = "Đã {action} {device}!"
+NO_WEATHER_KEY_TEXT = "Em chưa có chìa khóa API để xem thời tiết đâu ạ."
+WEATHER_SLOW_TEXT = "Mạng bên em đang chậm, em chưa xem được thời tiết ạ."
+NEWS_NOT_READY_TEXT = "Em chưa cập nhật được tin tức, anh chị hỏi lại sau nhé."
+
+def device_ack(device_id, state):
+    """Spoken acknowledgement for a device command"""
+    action_vn = 'bật' if state == 'on' else 'tắt'
+    device = registry.get(device_id)
+    return DEVICE_ACK_TEMPLATE.format(action=action_vn, device=device.name if device else device_id)
+
+def _join_vn(items):
+    return items[0] if len(items) == 1 else ", ".join(items[:-1]) + " và " + items[-1]
+
+def devices_ack(commands):
+    """One spoken summary for several device commands"""
+    if len(commands) == 1:
+        return device_ack(*commands[0])
+    groups = {}
+    for device_id, state in commands:
+        device = registry.get(device_id)
+        groups.setdefault(state, []).append(device.name if device else device_id)
+    parts = [f"{'bật' if state == 'on' else 'tắt'} {_join_vn(names)}" for state, names in groups.items()]
+    return f"Đã {', '.join(parts)}!"
+
+def warm_phrases():
+    """Every templated phrase the voice loop can say"""
+    phrases = [GREETING_TEXT, GOODBYE_TEXT, NO_WEATHER_KEY_TEXT, WEATHER_SLOW_TEXT, NEWS_NOT_READY_TEXT]
+    for dev in registry.devices:
+        for state in ("on", "off"):
+            phrases.append(device_ack(dev, state))
+    # canned intent replies skip the LLM: they should not wait on a TTS round trip either
+    for response in canned_responses():
+        phrases.extend(split_sentences(_clean_text(response)))
+    return phrases
+
+tts_cache = TTSCache()
+# cloud voice first, offline engines take over when it is slow or unreachable
+tts_router = TTSRouter([
+    EdgeTTSBackend(VOICE_NAME, TTS_PITCH, TTS_RATE),
+    PiperBackend(),
+    EspeakBackend(),
+])
+# the robot's own voice must not raise the noise floor
+mic = MicCapture(MIC_DEVICE_INDEX, floor_frozen=audio_service.is_busy)
+# offline recognizer first when its model is installed (STT_BACKEND / config "stt" to pick)
+stt_router = STTRouter([
+    VoskBackend(),
+    GoogleSTTBackend(),
+])
+metrics.register_source("tts_cache", tts_cache.stats)
+metrics.register_source("mic", mic.stats)
+metrics.register_source("tts_backends", tts_router.stats)
+metrics.register_source("stt_backends", stt_router.stats)
+# tokens are cut into sentences and spoken while the model is still generating
+llm = LLMStreamer(LOCAL_MODEL)
+metrics.register_source("llm", llm.stats)
+# preload at boot, keep_alive by activity, unload on low RAM or when AI is switched off
+model_manager = ModelManager(llm)
+llm.keep_alive = model_manager.keep_alive
+metrics.register_source("model", model_manager.stats)
+# multi-turn memory within a token budget; old turns are folded into a rolling summary
+memory = ConversationMemory(SYS_INSTRUCT_BASE, llm)
+metrics.register_source("memory", memory.stats)
+# repeated small talk is answered from disk instead of a full generation
+llm_cache = LLMResponseCache()
+metrics.register_source("llm_cache", llm_cache.stats)
+
+def _clean_text(text):
+    return re.sub(r"\([^)]*\)", "", text).replace("*", "").strip()
+
+def _tts_cache_key(clean, backend):
+    return TTSCache.make_key(clean, backend.voice, backend.pitch, backend.rate, TTS_OUTPUT_FORMAT)
+
+def _cached_tts(clean, backend=None):
+    """Cached rendition from the backend the router prefers right now (one counted lookup)"""
+    if backend is None:
+        candidates = tts_router.candidates()
+        if not candidates:
+            return None
+        backend = candidates[0]
+    return tts_cache.get(_tts_cache_key(clean, backend))
+
+_primary_rewarm_pending = False   # fixed phrases were rendered by a fallback voice
+
+def _note_tts_backend(backend):
+    """Once the primary voice works again, re-render fixed phrases a fallback rendered"""
+    global _primary_rewarm_pending
+    if _primary_rewarm_pending and tts_router.backends and backend is tts_router.backends[0]:
+        _primary_rewarm_pending = False
+        asyncio.ensure_future(warm_tts_cache(prepare=False))
+
+def _store_pcm_in_cache(key, pcm_bytes):
+    """Wrap raw s16le PCM in a wav header and publish it to the TTS cache"""
+    tmp = tts_cache.tmp_path_for(key)
+    try:
+        with wave.open(tmp, 'wb') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(TTS_OUTPUT_RATE)
+            wf.writeframes(pcm_bytes)
+        tts_cache.put(key, tmp)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+async def synthesize_cached(clean):
+    """Return a playback-ready wav for the text, synthesizing it only on a cache miss"""
+    return _cached_tts(clean) or await _synthesize_to_cache(clean)
+
+async def _synthesize_to_cache(clean):
+    backend, pcm = await tts_router.synthesize(clean, TTS_OUTPUT_RATE)
+    if len(pcm) == 0:
+        raise RuntimeError("TTS produced no audio")
+
+    key = _tts_cache_key(clean, backend)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, _store_pcm_in_cache, key, pcm.tobytes())
+    _note_tts_backend(backend)
+    return tts_cache.path_for(key)
+
+async def warm_tts_cache(phrases=None, prepare=True):
+    """Pre-render fixed phrases in the primary voice so acks play straight from disk"""
+    global _primary_rewarm_pending
+    if prepare:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, tts_router.prepare)
+    if not tts_router.backends:
+        return
+    primary = tts_router.backends[0]
+    for phrase in phrases or warm_phrases():
+        if STOP_EVENT.is_set():
+            return
+        clean = _clean_text(phrase)
+        if not clean or tts_cache.contains(_tts_cache_key(clean, primary)):
+            continue
+        try:
+            await synthesize_cached(clean)
+        except Exception as e:
+            print(f"TTS warm-up error ({clean}): {e}")
+        if not tts_cache.contains(_tts_cache_key(clean, primary)):
+            # e.g. no Wi-Fi at boot: a fallback voice for now, re-rendered when the primary is back
+            _primary_rewarm_pending = True
+    print(f">>> 🔊 TTS cache ready: {tts_cache.stats()}")
+
+async def warm_stt():
+    """Load the offline recognizer model before the first utterance"""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, stt_router.prepare)
+    print(f">>> 🎙️ STT ready: {stt_router.stats()}")
+
+async def _speak_streaming(clean, t0):
+    """Play PCM chunks from the TTS backend as they arrive, through a bounded buffer"""
+    loop = asyncio.get_running_loop()
+    pcm_parts = []
+    backend = None
+
+    playback = audio_service.open_stream(PRIORITY_TTS)
+    try:
+        async for backend, chunk in tts_router.stream(clean, TTS_OUTPUT_RATE):
+            if STOP_EVENT.is_set() or playback.cancelled:
+                playback.cancel()
+                return
+            pcm_parts.append(chunk)
+            await loop.run_in_executor(None, playback.write, chunk)
+
+        playback.close()
+        await loop.run_in_executor(None, playback.wait)
+    except BaseException:
+        playback.cancel()
+        raise
+
+    if playback.started_at is not None:
+        ttfa = playback.started_at - t0
+        metrics.record_latency("tts_ttfa_stream", ttfa)
+        print(f">>> ⏱️ TTS first audio (stream, {backend.name}): {ttfa * 1000:.0f} ms")
+
+    pcm = b"".join(pcm_parts)
+    if pcm and backend and not playback.cancelled:
+        pcm = pcm[:len(pcm) // 2 * 2]
+        await loop.run_in_executor(None, _store_pcm_in_cache, _tts_cache_key(clean, backend), pcm)
+        _note_tts_backend(backend)
+
+async def speak(text: str, stream=None):
     if not globals.SYSTEM_CONFIG.get("sound", True) or STOP_EVENT.is_set():
         return
 
-    clean = re.sub(r"\([^)]*\)", "", text).replace("*", "").strip()
+    clean = _clean_text(text)
     if not clean:
         return
 
     print(f"Hanah: {clean}")
 
-    raw_wav = f"/tmp/hanah_raw_{int(time.time()*1000)}.wav"
-    final_wav = f"/tmp/hanah_{int(time.time()*1000)}.wav"
+    if stream is None:
+        stream = TTS_STREAMING
+    t0 = time.monotonic()
 
     try:
-        communicate = edge_tts.Communicate(
-            clean,
-            VOICE_NAME,
-            pitch=TTS_PITCH,
-            rate=TTS_RATE
-        )
-        await communicate.save(raw_wav)
+        cached_wav = _cached_tts(clean)
+        cached = cached_wav is not None
+        if stream and not cached:
+            await _speak_streaming(clean, t0)
+            return
 
-        # 🔥 THIS LINE FIXES THE GARBAGE SOUND
-        convert_wav_safe(raw_wav, final_wav)
+        final_wav = cached_wav or await _synthesize_to_cache(clean)
 
         loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, _play_wav_blocking, final_wav)
+        pcm = await loop.run_in_executor(None, read_wav_pcm, final_wav, TTS_OUTPUT_RATE)
+        playback = audio_service.play(pcm, PRIORITY_TTS)
+        try:
+            await loop.run_in_executor(None, playback.wait)
+        except asyncio.CancelledError:
+            playback.cancel()
+            raise
+
+        if playback.started_at is not None:
+            ttfa = playback.started_at - t0
+            metrics.record_latency("tts_ttfa_cache" if cached else "tts_ttfa_file", ttfa)
+            print(f">>> ⏱️ TTS first audio ({'cache' if cached else 'file'}): {ttfa * 1000:.0f} ms")
 
     except Exception as e:
         print(f"speak() error: {e}")
         amp.off()
-    finally:
-        for f in (raw_wav, final_wav):
-            try:
-                if os.path.exists(f):
-                    os.remove(f)
-            except:
-                pass
 
-def play_activation_sound():
-    """Non-blocking activation 'tinh' via temporary wav + aplay"""
-    if not globals.SYSTEM_CONFIG.get("sound", True):
+# ==========================================
+# SENTENCE-PIPELINED SPEECH
+# ==========================================
+
+def split_sentences(text):
+    """Split a reply into speakable sentences, merging very short fragments"""
+    parts = re.split(r"(?<=[.!?…;])\s+|\n+", text)
+    sentences = []
+    carry = ""
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        carry = f"{carry} {part}".strip() if carry else part
+        if len(carry) >= MIN_SENTENCE_CHARS:
+            sentences.append(carry)
+            carry = ""
+    if carry:
+        if sentences and len(carry) < MIN_SENTENCE_CHARS:
+            sentences[-1] = f"{sentences[-1]} {carry}"
+        else:
+            sentences.append(carry)
+    return sentences
+
+async def _aiter(items):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+async def _render_pcm(clean):
+    """Playback-ready PCM for one sentence (through the TTS cache)"""
+    path = await synthesize_cached(clean)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, read_wav_pcm, path, TTS_OUTPUT_RATE)
+
+def _report_pipeline(playbacks, t0, label):
+    """Record time-to-first-audio and inter-sentence gaps for one reply"""
+    started = [p for p in playbacks if p.started_at is not None]
+    if not started:
         return
+    ttfa = started[0].started_at - t0
+    metrics.record_latency(f"tts_ttfa_{label}", ttfa)
+
+    gaps = []
+    for prev, nxt in zip(started, started[1:]):
+        if prev.finished_at is None:
+            continue
+        gap = max(0.0, nxt.started_at - prev.finished_at)
+        gaps.append(gap)
+        metrics.record_latency("tts_sentence_gap", gap)
+        if gap > SENTENCE_GAP_WARN:
+            metrics.incr("tts_audible_gaps")
+    worst = max(gaps) * 1000 if gaps else 0
+    print(f">>> ⏱️ TTS first audio ({label}): {ttfa * 1000:.0f} ms | {len(started)} câu, gap max {worst:.0f} ms")
+
+async def speak_pipelined(sentences, label="pipeline", t0=None):
+    """Synthesize sentence N+1 while sentence N plays, with a bounded lookahead"""
+    if not globals.SYSTEM_CONFIG.get("sound", True) or STOP_EVENT.is_set():
+        return
+
+    loop = asyncio.get_running_loop()
+    t0 = t0 if t0 is not None else time.monotonic()
+    queued = []      # every playback of this reply, in order
+    in_flight = []   # queued on the device, not finished yet
 
     try:
-        duration = 0.12
-        sample_rate = 24000
-        n_samples = int(sample_rate * duration)
-        t = np.linspace(0, duration, n_samples, False)
-        tone = np.sin(880 * t * 2 * np.pi)
-        fade_out = np.linspace(1, 0, n_samples)
-        tone = (tone * fade_out)
-        audio_data = (tone * 32767).astype(np.int16)
-
-        # write temp wav
-        tmp = tempfile.NamedTemporaryFile(prefix="hanah_tone_", suffix=".wav", delete=False)
-        tmp_name = tmp.name
-        tmp.close()
-        with wave.open(tmp_name, 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)  # 16-bit
-            wf.setframerate(sample_rate)
-            wf.writeframes(audio_data.tobytes())
+        async for sentence in _aiter(sentences):
+            clean = _clean_text(sentence)
+            if not clean:
+                continue
+            if STOP_EVENT.is_set() or any(p.cancelled for p in queued):
+                break
+            print(f"Hanah: {clean}")
+
+            pcm = await _render_pcm(clean)
+
+            while len(in_flight) >= SENTENCE_LOOKAHEAD:
+                await loop.run_in_executor(None, in_flight.pop(0).wait)
+            playback = audio_service.play(pcm, PRIORITY_TTS)
+            queued.append(playback)
+            in_flight.append(playback)
+
+        for playback in in_flight:
+            await loop.run_in_executor(None, playback.wait)
+    except asyncio.CancelledError:
+        for playback in in_flight:
+            playback.cancel()
+        raise
+    except Exception as e:
+        print(f"speak_pipelined() error: {e}")
+        for playback in in_flight:
+            playback.cancel()
+        amp.off()
+
+    _report_pipeline(queued, t0, label)
 
-        # play in background thread so listen() is immediate
-        _play_wav_blocking(tmp_name)
+async def speak_sentences(text):
+    """Speak a long reply sentence by sentence (single sentences use speak())"""
+    clean = _clean_text(text)
+    sentences = split_sentences(clean)
+    if len(sentences) <= 1:
+        await speak(clean)
+        return
+    await speak_pipelined(sentences)
 
+def play_activation_sound():
+    """Activation 'tinh' from the pre-rendered earcon bank"""
+    try:
+        # wait for the cue so it does not bleed into the recording
+        earcon_bank.play("listening", wait=True)
     except Exception as e:
         print(f"Lỗi âm thanh cue: {e}")
         try:
@@ -147,32 +404,71 @@ def play_activation_sound():
         except:
             pass
 
-def listen():
+def _listen_streaming(stream, on_partial, start=None):
+    """Feed the phrase to the STT stream while it is spoken; partials go to on_partial"""
+    failed = []
+
+    def feed(chunk):
+        if failed:
+            return
+        try:
+            partial = stream.feed(chunk)
+        except Exception as e:
+            print(f"STT stream error: {e}")
+            failed.append(e)
+            return
+        if partial:
+            on_partial(partial)
+
+    pcm = mic.get_utterance(timeout=5, phrase_time_limit=8, on_audio=feed, start=start)
+    if pcm is None or not len(pcm):
+        return None
+    if failed:
+        return stt_router.transcribe(pcm, mic.rate)
+    return stream.finish()
+
+def listen(on_partial=None):
+    """Next command as text; on_partial(text) gets partial hypotheses when the STT backend streams"""
     # global globals.LAST_TONE_TIME
 
     if not globals.SYSTEM_CONFIG["mic"]:
         return None
 
-    r = sr.Recognizer()
-    r.energy_threshold = 2000
-
     try:
-        with sr.Microphone(device_index=MIC_DEVICE_INDEX) as source:
-            r.adjust_for_ambient_noise(source, duration=0.5)
-
+        # capture thread is already running: no device reopen, no recalibration
+        mic.start()
+
+        start = None   # ring cursor the command is read from (None = from now)
+        if wake_word.enabled:
+            # the follow-up window starts once Hanah has finished talking
+            if audio_service.is_busy() and wake_word.is_awake():
+                wake_word.keep_awake()
+            if not wake_word.is_awake():
+                # only the on-device spotter runs until somebody says "Hanah"
+                start = wake_word.wait(mic, timeout=5)
+                if start is None:
+                    return None
+                print(">>> 👂 Wake word detected")
+                play_activation_sound()
+        else:
+            # no enrolled templates: old behaviour, cue every few seconds
             now = time.time()
-            if now - globals.LAST_TONE_TIME > 3: 
+            if now - globals.LAST_TONE_TIME > 3:
                 play_activation_sound()
                 globals.LAST_TONE_TIME = now
 
-            audio = r.listen(source, timeout=5, phrase_time_limit=8)
-            return r.recognize_google(audio, language="vi-VN")
-
-    except sr.WaitTimeoutError:
-        return None
-
-    except sr.UnknownValueError:
-        return None
+        stream = stt_router.open_stream(mic.rate) if on_partial else None
+        if stream is not None:
+            # "Hanah, bật đèn hai" in one breath: the command continues right after the wake word
+            text = _listen_streaming(stream, on_partial, start)
+        else:
+            pcm = mic.get_utterance(timeout=5, phrase_time_limit=8, start=start)
+            if pcm is None or not len(pcm):
+                return None
+            text = stt_router.transcribe(pcm, mic.rate)
+        if text and wake_word.enabled:
+            wake_word.keep_awake()
+        return text
 
     except sr.RequestError as e:
         print(f"Speech API error: {e}")
@@ -186,38 +482,34 @@ def listen():
 # WEATHER & INFO FUNCTIONS
 # ==========================================
 
-def get_weather(city):
-    """Query weather for any location"""
-    if not OPENWEATHER_API_KEY:
-        return "Em chưa có chìa khóa API để xem thời tiết đâu ạ."
-    
-    url = (
-        f"http://api.openweathermap.org/data/2.5/weather?"
-        f"q={city}&appid={OPENWEATHER_API_KEY}&units=metric&lang=vi"
-    )
-    
-    try:
-        res = weather_session.get(url, timeout=2).json()
-        
-        if res.get("cod") != 200:
-            return f"Em không tìm thấy thông tin thời tiết của khu vực {city} rồi."
-        
-        temp = round(res['main']['temp'])
-        desc = res['weather'][0]['description']
-        return f"Thời tiết ở {city} hiện là {temp} độ, {desc} ạ."
-    except Exception as e:
-        print(f"Lỗi Weather API: {e}")
-        return "Mạng bên em đang chậm, em chưa xem được thời tiết ạ."
-
-
-def check_info_request(user_text):
-    """Handle time and weather requests"""
+async def get_weather(city):
+    """Query weather for any location (cached; stale answers are refreshed in the background)"""
+    if not weather.enabled:
+        return NO_WEATHER_KEY_TEXT
+
+    status, data = await weather.get(city)
+    if status == "error":
+        return WEATHER_SLOW_TEXT
+    if data is None:
+        return f"Em không tìm thấy thông tin thời tiết của khu vực {city} rồi."
+    return f"Thời tiết ở {city} hiện là {data['temp']} độ, {data['desc']} ạ."
+
+
+def get_news(category):
+    """Latest headlines from the background poller's index (no network at ask time)"""
+    headlines = news.headlines(category)
+    if not headlines:
+        return NEWS_NOT_READY_TEXT
+    titles = ". ".join(h.title.rstrip(".") for h in headlines)
+    return f"Tin {category} mới nhất ạ: {titles}."
+
+def detect_info_request(user_text):
+    """Cheap keyword check: ("time", None) / ("weather", city) / None"""
     t = user_text.lower()
     
     # Time request
     if any(w in t for w in ["mấy giờ", "thời gian", "giờ rồi"]):
-        now = datetime.now()
-        return f"Dạ, bây giờ là {now.hour} giờ {now.minute} phút ạ."
+        return "time", None
     
     # Weather request
     if "thời tiết" in t:
@@ -226,32 +518,29 @@ def check_info_request(user_text):
             city_name = match.group(1).strip()
             if not city_name or city_name in ["nhỉ", "thế nào", "sao"]:
                 city_name = "Hanoi"
-            return get_weather(city_name)
-        return get_weather("Hanoi")
+            return "weather", city_name
+        return "weather", "Hanoi"
     
     return None
 
+async def answer_info_request(kind, arg=None):
+    """Spoken answer for a detected info request (weather may await the network, never blocking the loop)"""
+    if kind == "time":
+        now = datetime.now()
+        return f"Dạ, bây giờ là {now.hour} giờ {now.minute} phút ạ."
+    if kind == "weather":
+        return await get_weather(arg)
+    return None
+
+async def check_info_request(user_text):
+    """Handle time and weather requests"""
+    request = detect_info_request(user_text)
+    return await answer_info_request(*request) if request else None
+
+def parse_device_commands(user_text):
+    """Every device command in the utterance as [(device_id, state), ...]"""
+    return registry.parse(user_text)
+
 def analyze_command_similarity(user_text):
-    """Analyze device control commands (lights)"""
-    t = user_text.lower()
-    
-    # Check if command contains both action and device number
-    if not (any(w in t for w in ["bật", "tắt"]) and 
-            any(w in t for w in ["1", "2", "3", "4"])):
-        return None
-    
-    actions = {"bật": "on", "tắt": "off"}
-    best_score = 0
-    best_cmd = None
-    
-    for dev in ["1", "2", "3", "4"]:
-        for act, state in actions.items():
-            phrase = f"{act} đèn {dev}"
-            score = SequenceMatcher(None, t, phrase).ratio()
-            if dev in t:
-                score += 0.2
-            if score > best_score:
-                best_score = score
-                best_cmd = (dev, state)
-    
-    return best_cmd if best_score >= SIMILARITY_THRESHOLD else None
\ No newline at end of file
+    """Analyze device control commands: (device_id, state) from the device registry, or None"""
+    return registry.match(user_text)
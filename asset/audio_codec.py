@@ -0,0 +1,234 @@
+import io
+import subprocess
+import threading
+import wave
+
+import numpy as np
+
+try:
+    import av  # PyAV (required, see guide.md): in-process ffmpeg decoders, no subprocess per clip
+except ImportError:
+    av = None
+    print("⚠️ PyAV chưa được cài (pip install av): mỗi câu edge_tts / file âm thanh sẽ chạy một tiến trình ffmpeg")
+
+# ==========================================
+# AUDIO DECODE / RESAMPLE CONFIGURATION
+# ==========================================
+DEFAULT_RATE = 44100
+DECODE_READ_SIZE = 4096
+
+
+def sniff_format(data):
+    """Guess container from magic bytes: wav / mp3 / webm / None"""
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return "wav"
+    if data[:3] == b"ID3" or (len(data) > 1 and data[0] == 0xFF and (data[1] & 0xE0) == 0xE0):
+        return "mp3"
+    if data[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    return None
+
+
+def downmix(samples, channels):
+    """Interleaved float samples -> mono"""
+    if channels <= 1:
+        return samples
+    usable = len(samples) - len(samples) % channels
+    return samples[:usable].reshape(-1, channels).mean(axis=1)
+
+
+def resample(samples, src_rate, dst_rate):
+    """Vectorized linear-interpolation resampler (box pre-filter when decimating)"""
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    if src_rate > dst_rate:
+        width = int(np.ceil(src_rate / dst_rate))
+        if width > 1:
+            samples = np.convolve(samples, np.ones(width, dtype=np.float32) / width, mode="same")
+    n_out = int(round(len(samples) * dst_rate / src_rate))
+    positions = np.arange(n_out, dtype=np.float64) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def to_int16(samples):
+    return np.clip(samples, -32768, 32767).astype(np.int16)
+
+
+def convert_pcm(pcm, src_rate, dst_rate):
+    """int16 mono PCM at src_rate -> int16 mono PCM at dst_rate"""
+    if src_rate == dst_rate:
+        return pcm
+    return to_int16(resample(pcm.astype(np.float32), src_rate, dst_rate))
+
+
+def _decode_wav(data):
+    with wave.open(io.BytesIO(data), 'rb') as wf:
+        channels = wf.getnchannels()
+        width = wf.getsampwidth()
+        rate = wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+
+    if width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32)
+    elif width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) * 256.0
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 65536.0
+    else:
+        raise ValueError(f"Unsupported wav sample width: {width}")
+    return samples, channels, rate
+
+
+def _decode_av(data):
+    """Decode any container PyAV understands to mono float samples"""
+    with av.open(io.BytesIO(data)) as container:
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=stream.rate or DEFAULT_RATE)
+        parts = []
+        for frame in container.decode(stream):
+            for out in resampler.resample(frame):
+                parts.append(out.to_ndarray().reshape(-1))
+        for out in resampler.resample(None):
+            parts.append(out.to_ndarray().reshape(-1))
+        rate = resampler.rate
+    if not parts:
+        return np.zeros(0, dtype=np.float32), 1, rate
+    return np.concatenate(parts).astype(np.float32), 1, rate
+
+
+def _decode_ffmpeg_pipe(data, rate):
+    """Degraded path when PyAV is missing: bytes in, s16le out over pipes (no temp files)"""
+    res = subprocess.run(
+        [
+            "/usr/bin/ffmpeg", "-loglevel", "quiet",
+            "-i", "pipe:0",
+            "-f", "s16le", "-acodec", "pcm_s16le",
+            "-ac", "1", "-ar", str(rate),
+            "pipe:1"
+        ],
+        input=data, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    return np.frombuffer(res.stdout, dtype="<i2").astype(np.float32), 1, rate
+
+
+def decode_audio(data, rate=DEFAULT_RATE):
+    """Decode wav/mp3/webm bytes to mono int16 PCM at the requested rate, all in memory"""
+    if not data:
+        return np.zeros(0, dtype=np.int16)
+
+    fmt = sniff_format(data)
+    if fmt == "wav":
+        try:
+            samples, channels, src_rate = _decode_wav(data)
+        except (wave.Error, ValueError):
+            samples, channels, src_rate = None, 0, 0
+    else:
+        samples = None
+
+    if samples is None:
+        if av is not None:
+            samples, channels, src_rate = _decode_av(data)
+        else:
+            samples, channels, src_rate = _decode_ffmpeg_pipe(data, rate)
+
+    samples = downmix(samples, channels)
+    samples = resample(samples, src_rate, rate)
+    return to_int16(samples)
+
+
+def pcm_to_wav_bytes(pcm, rate=DEFAULT_RATE):
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def read_wav_pcm(path, rate=DEFAULT_RATE):
+    with open(path, 'rb') as f:
+        return decode_audio(f.read(), rate)
+
+
+# ==========================================
+# STREAMING DECODERS
+# ==========================================
+
+class AVStreamDecoder:
+    """In-process incremental mp3 decoder: feed() compressed chunks, on_pcm() gets s16le bytes"""
+
+    def __init__(self, rate, on_pcm, fmt="mp3"):
+        self.on_pcm = on_pcm
+        self._codec = av.CodecContext.create(fmt, "r")
+        self._resampler = av.AudioResampler(format="s16", layout="mono", rate=rate)
+
+    def _emit(self, frames):
+        for frame in frames:
+            for out in self._resampler.resample(frame):
+                self.on_pcm(out.to_ndarray().tobytes())
+
+    def feed(self, data):
+        for packet in self._codec.parse(data):
+            self._emit(self._codec.decode(packet))
+
+    def close(self):
+        for packet in self._codec.parse(b""):
+            self._emit(self._codec.decode(packet))
+        self._emit(self._codec.decode(None))
+        for out in self._resampler.resample(None):
+            self.on_pcm(out.to_ndarray().tobytes())
+
+    def abort(self):
+        pass
+
+
+class FFmpegStreamDecoder:
+    """Decodes a compressed byte stream (mp3/webm) to s16le PCM through one ffmpeg pipe"""
+
+    def __init__(self, rate, on_pcm, fmt="mp3", channels=1):
+        self.on_pcm = on_pcm
+        self._proc = subprocess.Popen(
+            [
+                "/usr/bin/ffmpeg", "-loglevel", "quiet",
+                "-probesize", "32", "-analyzeduration", "0", "-fflags", "nobuffer",
+                "-f", fmt, "-i", "pipe:0",
+                "-f", "s16le", "-acodec", "pcm_s16le",
+                "-ac", str(channels), "-ar", str(rate),
+                "-flush_packets", "1",
+                "pipe:1"
+            ],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        while True:
+            data = self._proc.stdout.read1(DECODE_READ_SIZE)
+            if not data:
+                break
+            self.on_pcm(data)
+
+    def feed(self, data):
+        self._proc.stdin.write(data)
+        self._proc.stdin.flush()
+
+    def close(self):
+        """Flush remaining audio and wait until every PCM chunk was delivered"""
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        self._reader.join()
+        self._proc.wait()
+
+    def abort(self):
+        self._proc.kill()
+
+
+def open_stream_decoder(rate, on_pcm, fmt="mp3"):
+    """In-process PyAV decoder; one ffmpeg pipe per stream only if the required PyAV is missing"""
+    if av is not None:
+        return AVStreamDecoder(rate, on_pcm, fmt)
+    return FFmpegStreamDecoder(rate, on_pcm, fmt)
@@ -0,0 +1,325 @@
+import fcntl
+import heapq
+import itertools
+import os
+import queue
+import subprocess
+import threading
+import time
+
+import numpy as np
+
+import metrics
+
+try:
+    import sounddevice as sd
+except ImportError:
+    sd = None
+
+# ==========================================
+# AUDIO OUTPUT CONFIGURATION
+# ==========================================
+AUDIO_BACKEND = os.getenv('AUDIO_BACKEND', 'aplay')    # 'aplay' | 'sounddevice'
+APLAY_DEVICE = os.getenv('APLAY_DEVICE', 'plughw:2,0')
+SD_DEVICE = os.getenv('SD_OUTPUT_DEVICE')              # sounddevice name/index, None = default
+OUTPUT_RATE = 44100
+BLOCK_MS = 20                                          # write granularity (cancel / preempt latency)
+STREAM_BUFFER_CHUNKS = 32                              # bounded buffer for streamed playbacks
+MAX_AHEAD_BLOCKS = 2                                   # blocks written ahead of the speaker (aplay pacing)
+APLAY_PIPE_BYTES = 4096                                # shrink the 64 KiB default stdin pipe
+F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+
+# Lower number = more important
+PRIORITY_TTS = 0
+PRIORITY_REMOTE = 1
+PRIORITY_EARCON = 2
+
+
+class Playback:
+    """Handle for one queued sound: a PCM buffer, or a live stream fed with write()"""
+
+    def __init__(self, priority, pcm=None, streaming=False, max_chunks=STREAM_BUFFER_CHUNKS):
+        self.priority = priority
+        self.seq = None           # queue order within a priority, kept when preempted
+        self.streaming = streaming
+        self.queued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.underruns = 0
+        self.cancelled = False
+        self.done = threading.Event()
+        self._pending = pcm_to_bytes(pcm) if pcm is not None else b""
+        self._chunks = queue.Queue(maxsize=max_chunks) if streaming else None
+        self._closed = not streaming
+        self._carry = b""
+
+    # ---------- producer side (streams) ----------
+    def write(self, pcm):
+        """Append PCM to a stream; blocks while the buffer is full. False once cancelled"""
+        data = self._carry + pcm_to_bytes(pcm)
+        if len(data) % 2:
+            data, self._carry = data[:-1], data[-1:]
+        else:
+            self._carry = b""
+        while data and not self.cancelled:
+            try:
+                self._chunks.put(data, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return not self.cancelled
+
+    def close(self):
+        """No more data will be written to this stream"""
+        self._closed = True
+
+    # ---------- consumer side ----------
+    def cancel(self):
+        self.cancelled = True
+        self._finish()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def _finish(self):
+        if not self.done.is_set():
+            self.finished_at = time.monotonic()
+            self.done.set()
+
+    def _next_block(self, nbytes):
+        """Next chunk to write: bytes, b"" when starved (underrun) or None when finished"""
+        if self.streaming:
+            while len(self._pending) < nbytes:
+                try:
+                    self._pending += self._chunks.get_nowait()
+                except queue.Empty:
+                    break
+            if not self._pending:
+                return None if self._closed and self._chunks.empty() else b""
+        elif not self._pending:
+            return None
+        block, self._pending = self._pending[:nbytes], self._pending[nbytes:]
+        return block
+
+
+def pcm_to_bytes(pcm):
+    if isinstance(pcm, np.ndarray):
+        return pcm.astype(np.int16, copy=False).tobytes()
+    return bytes(pcm)
+
+
+class _AplayOutput:
+    """One long-lived raw aplay process with a small ALSA buffer, paced against the output clock"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.max_ahead = MAX_AHEAD_BLOCKS * BLOCK_MS / 1000
+        self._proc = None
+        self._clock = 0.0   # monotonic time at which everything written so far has been heard
+
+    def open(self):
+        self._proc = subprocess.Popen(
+            [
+                '/usr/bin/aplay', '-q', '-D', APLAY_DEVICE,
+                '-t', 'raw', '-f', 'S16_LE', '-r', str(self.rate), '-c', '1',
+                '--buffer-time=100000', '--period-time=20000', '-'
+            ],
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            # a full default pipe holds ~0.7 s of audio nobody can cancel any more
+            fcntl.fcntl(self._proc.stdin.fileno(), F_SETPIPE_SZ, APLAY_PIPE_BYTES)
+        except OSError:
+            pass
+        self._clock = 0.0
+
+    def write(self, data):
+        if self._proc is None or self._proc.poll() is not None:
+            self.open()
+        self._clock = max(self._clock, time.monotonic()) + len(data) / 2 / self.rate
+        self._proc.stdin.write(data)
+        self._proc.stdin.flush()
+        # stay at most max_ahead in front of the speaker so done / cancel / preempt are real time
+        ahead = self._clock - time.monotonic() - self.max_ahead
+        if ahead > 0:
+            time.sleep(ahead)
+        return False
+
+    def pending(self):
+        """Seconds of written audio not heard yet"""
+        return max(0.0, self._clock - time.monotonic())
+
+    def close(self):
+        if self._proc:
+            try:
+                self._proc.stdin.close()
+            except OSError:
+                pass
+            self._proc.wait()
+            self._proc = None
+
+
+class _SoundDeviceOutput:
+    """PortAudio output stream kept open for the life of the service"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._stream = None
+
+    def open(self):
+        self._stream = sd.RawOutputStream(
+            samplerate=self.rate, channels=1, dtype='int16',
+            device=SD_DEVICE, latency='low'
+        )
+        self._stream.start()
+
+    def write(self, data):
+        if self._stream is None:
+            self.open()
+        return bool(self._stream.write(data))  # True = underflowed
+
+    def pending(self):
+        return self._stream.latency if self._stream else 0.0
+
+    def close(self):
+        if self._stream:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+class AudioService:
+    """Owns the speaker: one output stream fed from a priority queue of Playbacks"""
+
+    def __init__(self, rate=OUTPUT_RATE, backend=AUDIO_BACKEND):
+        self.rate = rate
+        self.block_bytes = int(rate * BLOCK_MS / 1000) * 2
+        if backend == 'sounddevice' and sd is not None:
+            self.backend = 'sounddevice'
+            self._output = _SoundDeviceOutput(rate)
+        else:
+            self.backend = 'aplay'
+            self._output = _AplayOutput(rate)
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._current = None
+        self._thread = None
+        self._counters = {"played": 0, "cancelled": 0, "preempted": 0, "underruns": 0, "device_errors": 0}
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return self
+
+    # ---------- public API ----------
+    def play(self, pcm, priority=PRIORITY_TTS):
+        """Queue an int16 buffer; returns its Playback handle immediately"""
+        return self._enqueue(Playback(priority, pcm=pcm))
+
+    def open_stream(self, priority=PRIORITY_TTS, max_chunks=STREAM_BUFFER_CHUNKS):
+        """Queue a stream; write() PCM into the handle, then close() it"""
+        return self._enqueue(Playback(priority, streaming=True, max_chunks=max_chunks))
+
+    def cancel_all(self, priority=None):
+        """Cancel queued and playing sounds (only one priority class if given)"""
+        with self._cond:
+            victims = [p for _, _, p in self._heap if priority is None or p.priority == priority]
+            self._heap = [e for e in self._heap if e[2] not in victims]
+            heapq.heapify(self._heap)
+            if self._current and (priority is None or self._current.priority == priority):
+                victims.append(self._current)
+        for p in victims:
+            p.cancel()
+        self._counters["cancelled"] += len(victims)
+
+    def is_busy(self):
+        """True while something is playing or queued"""
+        with self._cond:
+            return self._current is not None or any(not p.cancelled for _, _, p in self._heap)
+
+    def stats(self):
+        with self._cond:
+            depth = len(self._heap)
+            playing = self._current.priority if self._current else None
+        return dict(self._counters, backend=self.backend, queue_depth=depth, playing_priority=playing)
+
+    # ---------- worker ----------
+    def _enqueue(self, playback):
+        self.start()
+        with self._cond:
+            playback.seq = next(self._seq)
+            heapq.heappush(self._heap, (playback.priority, playback.seq, playback))
+            self._cond.notify()
+        return playback
+
+    def _pop(self):
+        with self._cond:
+            while True:
+                while not self._heap:
+                    self._cond.wait()
+                _, _, playback = heapq.heappop(self._heap)
+                # cancelled while queued: never becomes _current
+                if not playback.cancelled:
+                    self._current = playback
+                    return playback
+
+    def _should_preempt(self, playback):
+        with self._cond:
+            return bool(self._heap) and self._heap[0][0] < playback.priority
+
+    def _requeue(self, playback):
+        """Back into the queue with its original sequence: it resumes before anything queued after it"""
+        with self._cond:
+            heapq.heappush(self._heap, (playback.priority, playback.seq, playback))
+            self._current = None
+
+    def _run(self):
+        silence = b"\x00" * self.block_bytes
+        while True:
+            playback = self._pop()
+
+            while not playback.cancelled:
+                if self._should_preempt(playback):
+                    self._counters["preempted"] += 1
+                    self._requeue(playback)
+                    break
+                block = playback._next_block(self.block_bytes)
+                if block is None:
+                    # finished once the last block has actually been heard
+                    tail = self._output.pending()
+                    if tail > 0:
+                        time.sleep(tail)
+                    self._counters["played"] += 1
+                    playback._finish()
+                    break
+                if block == b"":
+                    if playback.started_at is None:
+                        # stream has not produced its first audio yet
+                        time.sleep(0.005)
+                        continue
+                    # stream producer is behind: keep the device fed
+                    playback.underruns += 1
+                    self._counters["underruns"] += 1
+                    block = silence
+                if playback.started_at is None:
+                    playback.started_at = time.monotonic()
+                    metrics.record_latency("audio_queue_wait", playback.started_at - playback.queued_at)
+                try:
+                    if self._output.write(block):
+                        self._counters["underruns"] += 1
+                except Exception as e:
+                    print(f"Audio output error: {e}")
+                    self._counters["device_errors"] += 1
+                    self._output.close()
+                    time.sleep(0.2)
+
+            with self._cond:
+                if self._current is playback:
+                    self._current = None
+
+
+audio_service = AudioService()
+metrics.register_source("audio", audio_service.stats)
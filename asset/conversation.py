@@ -0,0 +1,141 @@
+import asyncio
+import os
+import time
+
+import metrics
+
+# ==========================================
+# CONVERSATION MEMORY CONFIGURATION
+# ==========================================
+MEMORY_TOKEN_BUDGET = int(os.getenv('LLM_MEMORY_TOKENS', '768'))   # prompt budget, well under ollama's num_ctx
+KEEP_RECENT_TURNS = 2           # always sent verbatim
+MEMORY_IDLE_RESET = 300         # seconds of silence that start a new conversation
+SUMMARY_MAX_CHARS = 400
+SUMMARY_OPTIONS = {"num_predict": 120, "temperature": 0.2}
+CHARS_PER_TOKEN = 3.0           # rough qwen2.5 ratio for Vietnamese text
+SUMMARY_PROMPT = (
+    "Tóm tắt thật ngắn (tối đa 3 câu) những điều cần nhớ trong cuộc trò chuyện dưới đây giữa "
+    "người dùng và Hanah: tên, sở thích, yêu cầu và chủ đề đang nói. Chỉ trả lời bằng bản tóm tắt."
+)
+
+
+def estimate_tokens(text):
+    return int(len(text) / CHARS_PER_TOKEN) + 4   # + per-message template overhead
+
+
+class Turn:
+    __slots__ = ("user", "assistant", "tokens")
+
+    def __init__(self, user, assistant):
+        self.user = user
+        self.assistant = assistant
+        self.tokens = estimate_tokens(user) + estimate_tokens(assistant)
+
+
+class ConversationMemory:
+    """Token-budgeted chat history: append-only between compactions so ollama can reuse the cached prefix"""
+
+    def __init__(self, system_prompt, llm, budget=MEMORY_TOKEN_BUDGET, keep_recent=KEEP_RECENT_TURNS):
+        self.system_prompt = system_prompt
+        self.llm = llm
+        self.budget = budget
+        self.keep_recent = keep_recent
+        self.summary = ""
+        self.turns = []
+        self.last_active = 0.0
+        self._compacting = None
+        self._counters = {"turns": 0, "compactions": 0, "summary_fallbacks": 0, "resets": 0}
+
+    # ---------- prompt ----------
+    def prompt_tokens(self):
+        tokens = estimate_tokens(self.system_prompt) + sum(t.tokens for t in self.turns)
+        return tokens + (estimate_tokens(self.summary) if self.summary else 0)
+
+    def _expire_idle(self):
+        if self.turns and time.monotonic() - self.last_active > MEMORY_IDLE_RESET:
+            self.reset()
+
+    def fresh(self):
+        """True when the next prompt carries no earlier context (no turns, no summary)"""
+        self._expire_idle()
+        return not self.turns and not self.summary
+
+    def messages(self, user_text):
+        """system prompt, summary, past turns, new utterance: each prompt extends the previous one"""
+        self._expire_idle()
+        messages = [{'role': 'system', 'content': self.system_prompt}]
+        if self.summary:
+            messages.append({'role': 'system', 'content': f"Tóm tắt cuộc trò chuyện trước: {self.summary}"})
+        for turn in self.turns:
+            messages.append({'role': 'user', 'content': turn.user})
+            messages.append({'role': 'assistant', 'content': turn.assistant})
+        messages.append({'role': 'user', 'content': user_text})
+        return messages
+
+    def add_turn(self, user_text, reply_text):
+        """Store the exact generated text (so the next prompt matches ollama's cache) and compact if over budget"""
+        self.turns.append(Turn(user_text, reply_text))
+        self.last_active = time.monotonic()
+        self._counters["turns"] += 1
+        if self.prompt_tokens() > self.budget and self._compacting is None:
+            self._compacting = asyncio.ensure_future(self.compact())
+
+    def reset(self):
+        self.summary = ""
+        self.turns = []
+        self._counters["resets"] += 1
+
+    # ---------- rolling summary ----------
+    def _turns_to_fold(self):
+        """Oldest turns to fold so the prompt drops to half the budget (compactions stay rare)"""
+        total = self.prompt_tokens()
+        n = 0
+        while len(self.turns) - n > self.keep_recent and total > self.budget // 2:
+            total -= self.turns[n].tokens
+            n += 1
+        return n
+
+    async def _summarize(self, turns):
+        lines = [f"Tóm tắt trước đó: {self.summary}"] if self.summary else []
+        for turn in turns:
+            lines.append(f"Người dùng: {turn.user}")
+            lines.append(f"Hanah: {turn.assistant}")
+        try:
+            summary = await self.llm.complete([
+                {'role': 'system', 'content': SUMMARY_PROMPT},
+                {'role': 'user', 'content': "\n".join(lines)},
+            ], SUMMARY_OPTIONS)
+        except Exception as e:
+            print(f"Conversation summary error: {e}")
+            summary = ""
+        if not summary.strip():
+            # keep at least what the user asked about
+            self._counters["summary_fallbacks"] += 1
+            asked = "; ".join(t.user for t in turns)
+            summary = f"{self.summary} Người dùng đã hỏi: {asked}.".strip()
+        return summary.strip()[-SUMMARY_MAX_CHARS:]
+
+    async def compact(self):
+        t0 = time.monotonic()
+        try:
+            n = self._turns_to_fold()
+            if n:
+                folded = self.turns[:n]
+                summary = await self._summarize(folded)
+                # turns added while summarizing stay after the folded ones
+                if self.turns[:n] == folded:
+                    self.summary = summary
+                    self.turns = self.turns[n:]
+                    self._counters["compactions"] += 1
+                    metrics.record_latency("memory_compaction", time.monotonic() - t0)
+        finally:
+            self._compacting = None
+
+    def stats(self):
+        return dict(
+            self._counters,
+            live_turns=len(self.turns),
+            prompt_tokens_est=self.prompt_tokens(),
+            budget=self.budget,
+            summary=self.summary,
+        )
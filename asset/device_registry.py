@@ -0,0 +1,194 @@
+import json
+import os
+import re
+
+import globals
+
+# ==========================================
+# DEVICE REGISTRY CONFIGURATION
+# ==========================================
+DEVICES_FILE = os.getenv('DEVICES_FILE', os.path.join(globals.BASE_DIR, "devices.json"))
+DEFAULT_TOPIC = "raspi/esp32/relay"
+DEFAULT_PAYLOAD = "{id}:{state}"
+
+# spoken Vietnamese numbers (offline STT spells them out)
+UNIT_WORDS = {
+    "không": 0, "một": 1, "mốt": 1, "hai": 2, "ba": 3, "bốn": 4, "tư": 4,
+    "năm": 5, "lăm": 5, "sáu": 6, "bảy": 7, "bẩy": 7, "tám": 8, "chín": 9,
+}
+CONJUNCTIONS = {"và"}   # "đèn 1 và 2": a bare number continues a device list
+_END = None   # trie key holding the value of a complete phrase
+
+
+def tokenize(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def normalize_numbers(tokens):
+    """'hai mươi mốt' -> '21', 'mười hai' -> '12', 'một' -> '1' (0-99)"""
+    out, i = [], 0
+    while i < len(tokens):
+        tok = tokens[i]
+        nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+        if tok == "mười":
+            value, i = 10, i + 1
+            if nxt in UNIT_WORDS:
+                value, i = 10 + UNIT_WORDS[nxt], i + 1
+        elif tok in UNIT_WORDS and nxt in ("mươi", "chục"):
+            value, i = UNIT_WORDS[tok] * 10, i + 2
+            if i < len(tokens) and tokens[i] in UNIT_WORDS:
+                value, i = value + UNIT_WORDS[tokens[i]], i + 1
+        elif tok in UNIT_WORDS:
+            value, i = UNIT_WORDS[tok], i + 1
+        else:
+            out.append(tok)
+            i += 1
+            continue
+        out.append(str(value))
+    return out
+
+
+class Device:
+    def __init__(self, spec):
+        self.id = str(spec["id"])
+        self.name = spec.get("name", f"thiết bị {self.id}")
+        self.aliases = spec.get("aliases", [])
+        self.room = spec.get("room")
+        self.topic = spec.get("topic", DEFAULT_TOPIC)
+        self.payload_format = spec.get("payload", DEFAULT_PAYLOAD)
+
+    def payload(self, state):
+        return self.payload_format.format(id=self.id, state=state)
+
+
+class DeviceRegistry:
+    """Devices and spoken aliases from devices.json, compiled into token tries for matching"""
+
+    def __init__(self, path=DEVICES_FILE):
+        self.path = path
+        self.devices = {}
+        self.fillers = set()
+        self._action_trie = {}
+        self._device_trie = {}
+        self._numbered = {}     # "2" -> id of "đèn 2" (bare numbers only count in context)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except Exception as e:
+            print(f"❌ Lỗi đọc danh sách thiết bị: {e}")
+            config = {}
+
+        self.fillers = set(config.get("fillers", []))
+        self.devices = {}
+        self._action_trie, self._device_trie, self._numbered = {}, {}, {}
+        for state, words in config.get("actions", {}).items():
+            for phrase in words:
+                self._insert(self._action_trie, phrase, state)
+        for spec in config.get("devices", []):
+            device = Device(spec)
+            self.devices[device.id] = device
+            for phrase in [device.name] + device.aliases:
+                self._insert(self._device_trie, phrase, device.id)
+            name_tokens = self._normalize(device.name)
+            if len(name_tokens) > 1 and name_tokens[-1].isdigit():
+                self._numbered[name_tokens[-1]] = device.id
+        print(f">>> 💡 Device registry: {len(self.devices)} devices")
+
+    def _normalize(self, text):
+        return [t for t in normalize_numbers(tokenize(text)) if t not in self.fillers]
+
+    def _insert(self, trie, phrase, value):
+        node = trie
+        for token in self._normalize(phrase):
+            node = node.setdefault(token, {})
+        node[_END] = value
+
+    @staticmethod
+    def _longest(trie, tokens, start):
+        """(value, length) of the longest phrase starting at tokens[start]"""
+        node, best = trie, (None, 0)
+        for j in range(start, len(tokens)):
+            node = node.get(tokens[j])
+            if node is None:
+                break
+            if _END in node:
+                best = (node[_END], j + 1 - start)
+        return best
+
+    def scan(self, text):
+        """Ordered ('action', state) / ('device', id) events; one pass over the tokens.
+
+        A bare number ("2") names a device only once a device phrase has been
+        said, and only right after an action ("tắt đèn 1, bật 2") or after
+        "và" following a device ("đèn 1 và 2"); "mở một bài nhạc" is no command.
+        """
+        tokens = self._normalize(text)
+        events, i = [], 0
+        device_said, prev = False, None
+        while i < len(tokens):
+            state, n_action = self._longest(self._action_trie, tokens, i)
+            device_id, n_device = self._longest(self._device_trie, tokens, i)
+            if n_device > n_action:
+                events.append(("device", device_id))
+                device_said, prev = True, "device"
+                i += n_device
+            elif n_action:
+                events.append(("action", state))
+                prev = "action"
+                i += n_action
+            elif device_said and prev in ("action", "and") and tokens[i] in self._numbered:
+                events.append(("device", self._numbered[tokens[i]]))
+                prev = "device"
+                i += 1
+            else:
+                prev = "and" if prev == "device" and tokens[i] in CONJUNCTIONS else None
+                i += 1
+        return events
+
+    def parse(self, text):
+        """Every (device_id, state) in the utterance, in spoken order.
+
+        An action applies to the devices after it until the next action
+        ("bật đèn 1 và đèn 2, tắt đèn 3"); devices named by a full phrase
+        before any action take the first action that follows ("đèn phòng
+        khách bật lên").
+        """
+        commands, pending, action = {}, [], None
+        for kind, value in self.scan(text):
+            if kind == "action":
+                action = value
+                for device_id in pending:
+                    commands[device_id] = action
+                pending = []
+            elif action is None:
+                pending.append(value)
+            else:
+                commands[value] = action
+        return list(commands.items())
+
+    def match(self, text):
+        """First (device_id, state) in the utterance, or None"""
+        commands = self.parse(text)
+        return commands[0] if commands else None
+
+    def batch_payloads(self, commands):
+        """{topic: payload}: one message per topic, commands joined by ','"""
+        batches = {}
+        for device_id, state in commands:
+            device = self.get(device_id)
+            if device is None:
+                continue
+            batches.setdefault(device.topic, []).append(device.payload(state))
+        return {topic: ",".join(parts) for topic, parts in batches.items()}
+
+    def get(self, device_id):
+        return self.devices.get(str(device_id))
+
+    def stats(self):
+        return {"devices": len(self.devices), "file": os.path.basename(self.path)}
+
+
+registry = DeviceRegistry()
@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+
+import globals
+from audio_codec import decode_audio
+from audio_service import audio_service, OUTPUT_RATE, PRIORITY_EARCON
+
+# ==========================================
+# EARCON CONFIGURATION
+# ==========================================
+# Drop "<name>.wav" / "<name>.mp3" in this folder to replace a built-in cue
+EARCON_DIR = os.getenv('EARCON_DIR', os.path.join(globals.BASE_DIR, "sounds"))
+EARCON_VOLUME = 1.0
+
+
+def _tone(rate, freq, duration, fade_in=0.005):
+    n = int(rate * duration)
+    t = np.arange(n, dtype=np.float32) / rate
+    tone = np.sin(2 * np.pi * freq * t)
+    env = np.linspace(1, 0, n, dtype=np.float32)
+    n_in = min(n, int(rate * fade_in))
+    env[:n_in] *= np.linspace(0, 1, n_in, dtype=np.float32)
+    return tone * env
+
+
+def _silence(rate, duration):
+    return np.zeros(int(rate * duration), dtype=np.float32)
+
+
+def _render_builtin(name, rate):
+    if name == "listening":
+        # the original 880 Hz 'tinh'
+        samples = _tone(rate, 880, 0.12)
+    elif name == "accepted":
+        samples = np.concatenate([_tone(rate, 660, 0.07), _tone(rate, 990, 0.10)])
+    elif name == "error":
+        samples = np.concatenate([_tone(rate, 440, 0.10), _silence(rate, 0.03), _tone(rate, 330, 0.16)])
+    elif name == "thinking":
+        samples = np.concatenate([_tone(rate, 520, 0.05), _silence(rate, 0.08), _tone(rate, 520, 0.05)]) * 0.5
+    else:
+        raise KeyError(name)
+    return (samples * EARCON_VOLUME * 32767).astype(np.int16)
+
+
+class EarconBank:
+    """Cue sounds rendered once at the output rate and played straight from memory"""
+
+    NAMES = ("listening", "accepted", "error", "thinking")
+
+    def __init__(self, rate=OUTPUT_RATE, sound_dir=EARCON_DIR):
+        self.rate = rate
+        self.sound_dir = sound_dir
+        self.sources = {}
+        self._pcm = {}
+        self.load()
+
+    def _custom_file(self, name):
+        for ext in (".wav", ".mp3"):
+            path = os.path.join(self.sound_dir, name + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def load(self):
+        """(Re)render every cue; custom files override the built-in tones"""
+        for name in self.NAMES:
+            path = self._custom_file(name)
+            if path:
+                try:
+                    with open(path, 'rb') as f:
+                        self._pcm[name] = decode_audio(f.read(), self.rate)
+                    self.sources[name] = path
+                    continue
+                except Exception as e:
+                    print(f"❌ Lỗi đọc earcon {path}: {e}")
+            self._pcm[name] = _render_builtin(name, self.rate)
+            self.sources[name] = "builtin"
+
+    def play(self, name, wait=False):
+        if not globals.SYSTEM_CONFIG.get("sound", True):
+            return None
+        pcm = self._pcm.get(name)
+        if pcm is None or not len(pcm):
+            return None
+        playback = audio_service.play(pcm, PRIORITY_EARCON)
+        if wait:
+            playback.wait(timeout=len(pcm) / self.rate + 1)
+        return playback
+
+
+earcon_bank = EarconBank()
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import metrics
+
+# ==========================================
+# EARLY INTENT CONFIGURATION
+# ==========================================
+PARTIAL_STABLE_SECONDS = 0.25   # a command must survive this long in the partials (well inside the VAD hangover)
+
+
+def opposite_state(state):
+    return "off" if state == "on" else "on"
+
+
+class EarlyIntent:
+    """Dispatches a device command from partial transcripts, reconciled with the final transcript"""
+
+    def __init__(self, match_fn, dispatch_fn, stable_seconds=PARTIAL_STABLE_SECONDS):
+        self.match_fn = match_fn          # text -> (device_id, state) or None
+        self.dispatch_fn = dispatch_fn    # (device_id, state) -> bool
+        self.stable_seconds = stable_seconds
+        self._lock = threading.Lock()
+        self._counters = {"dispatched": 0, "confirmed": 0, "reverted": 0}
+        self.reset()
+
+    def reset(self):
+        """Call before every utterance"""
+        with self._lock:
+            self.candidate = None
+            self.candidate_since = None
+            self.dispatched = None
+            self.dispatched_at = None
+
+    def on_partial(self, text):
+        """Partial hypothesis from the STT stream (capture thread), repeats included"""
+        cmd = self.match_fn(text)
+        now = time.monotonic()
+        with self._lock:
+            if self.dispatched is not None:
+                return
+            if cmd != self.candidate:
+                # stability is measured in time: an unchanged hypothesis keeps arriving as repeats
+                self.candidate, self.candidate_since = cmd, now
+            if cmd is None or now - self.candidate_since < self.stable_seconds:
+                return
+            self.dispatched = cmd
+            self.dispatched_at = now
+
+        print(f">>> ⚡ Early intent from partial '{text}': {cmd}")
+        self._counters["dispatched"] += 1
+        self.dispatch_fn(*cmd)
+
+    def reconcile(self, final_commands):
+        """Commands from the final transcript that still have to be sent (early one confirmed or undone)"""
+        final_commands = list(final_commands or [])
+        with self._lock:
+            early, at = self.dispatched, self.dispatched_at
+            self.dispatched = None
+        if early is None:
+            return final_commands
+
+        if early in final_commands:
+            self._counters["confirmed"] += 1
+            metrics.record_latency("intent_early_gain", time.monotonic() - at)
+            return [cmd for cmd in final_commands if cmd != early]
+
+        # final transcript disagrees: undo what the partial switched,
+        # unless the final transcript sets that device anyway
+        device_id, state = early
+        self._counters["reverted"] += 1
+        print(f">>> ↩️ Early intent {early} cancelled by final transcript ({final_commands})")
+        if all(cmd[0] != device_id for cmd in final_commands):
+            self.dispatch_fn(device_id, opposite_state(state))
+        return final_commands
+
+    def stats(self):
+        return dict(self._counters, stable_seconds=self.stable_seconds)
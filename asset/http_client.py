@@ -0,0 +1,134 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+
+import globals
+import metrics
+
+# ==========================================
+# ASYNC HTTP CONFIGURATION
+# ==========================================
+HTTP_POOL_SIZE = 8              # keep-alive connections shared by every provider
+HTTP_POOL_PER_HOST = 4
+HTTP_KEEPALIVE = 60             # seconds an idle connection stays open
+USER_AGENT = "Hanah/1.0"
+
+# per-provider limits: total timeout (s) and requests in flight
+PROVIDERS = {
+    "weather": {"timeout": 10.0, "concurrency": 2},
+    "news": {"timeout": 10.0, "concurrency": 3},
+    "default": {"timeout": 5.0, "concurrency": 2},
+}
+
+
+class HTTPResponse:
+    """Fully read response (the connection is already back in the pool)"""
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class ProviderStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
+
+class AsyncHTTPClient:
+    """One pooled keep-alive aiohttp session for all info providers, with per-provider timeout + semaphore"""
+
+    def __init__(self, providers=PROVIDERS):
+        self.providers = providers
+        self._session = None
+        self._loop = None
+        self._limits = {}
+        self._stats = {}
+
+    def _config(self, provider):
+        return self.providers.get(provider, self.providers["default"])
+
+    def _ensure_session(self):
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            # sessions and semaphores belong to one event loop
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_SIZE, limit_per_host=HTTP_POOL_PER_HOST, keepalive_timeout=HTTP_KEEPALIVE
+            )
+            self._session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT})
+            self._loop = loop
+            self._limits = {}
+        return self._session
+
+    def _limit(self, provider):
+        if provider not in self._limits:
+            self._limits[provider] = asyncio.Semaphore(self._config(provider)["concurrency"])
+        return self._limits[provider]
+
+    async def get(self, provider, url, params=None, headers=None, timeout=None):
+        """GET through the shared pool; raises asyncio.TimeoutError / aiohttp.ClientError"""
+        session = self._ensure_session()
+        stats = self._stats.setdefault(provider, ProviderStats())
+        total = timeout if timeout is not None else self._config(provider)["timeout"]
+
+        t0 = time.monotonic()
+        stats.requests += 1
+        try:
+            async with self._limit(provider):
+                stats.in_flight += 1
+                stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+                try:
+                    async with session.get(url, params=params, headers=headers,
+                                           timeout=aiohttp.ClientTimeout(total=total)) as res:
+                        return HTTPResponse(res.status, res.headers, await res.read())
+                finally:
+                    stats.in_flight -= 1
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            raise
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            metrics.record_latency(f"http_{provider}", time.monotonic() - t0)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self):
+        return {name: s.as_dict() for name, s in list(self._stats.items())}
+
+
+async def sleep_unless_stopped(seconds, step=1.0):
+    """asyncio.sleep that returns early once STOP_EVENT is set"""
+    deadline = time.monotonic() + seconds
+    while not globals.STOP_EVENT.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(min(step, remaining))
+
+
+http = AsyncHTTPClient()
+metrics.register_source("http", http.stats)
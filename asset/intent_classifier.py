@@ -0,0 +1,259 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+import globals
+import metrics
+
+# ==========================================
+# INTENT CLASSIFIER CONFIGURATION
+# ==========================================
+INTENTS_FILE = os.path.join(globals.BASE_DIR, "intents.json")             # seed examples + responses
+MODEL_FILE = os.path.join(globals.BASE_DIR, "models", "intent_classifier.npz")
+TRANSCRIPT_LOG = os.path.join(globals.BASE_DIR, "transcripts.jsonl")      # every utterance, labelled by hand later
+TRANSCRIPT_MAX_BYTES = int(os.getenv('TRANSCRIPT_MAX_BYTES', str(2 * 1024 * 1024)))   # then rotated to .1 (SD card)
+INTENT_CONFIDENCE = float(os.getenv('INTENT_CONFIDENCE', '0.7'))         # below this the LLM answers
+ROBOT_INTENT_CONFIDENCE = float(os.getenv('ROBOT_INTENT_CONFIDENCE', '0.85'))   # intents that move the robot
+OTHER = "other"                 # label for "needs the LLM"
+HASH_DIM = 4096                 # hashed char n-gram buckets
+NGRAM_MIN, NGRAM_MAX = 2, 4
+EPOCHS = 300
+LEARNING_RATE = 2.0
+L2 = 1e-4
+
+_log_lock = threading.Lock()
+
+
+def normalize(text):
+    return re.sub(r"[\W_]+", " ", text.lower()).strip()
+
+
+def featurize(texts):
+    """(n, HASH_DIM) L2-normalized counts of hashed char n-grams and words"""
+    X = np.zeros((len(texts), HASH_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        t = f" {normalize(text)} "
+        grams = [t[i:i + n] for n in range(NGRAM_MIN, NGRAM_MAX + 1) for i in range(len(t) - n + 1)]
+        grams += ["w:" + w for w in t.split()]
+        if not grams:
+            continue
+        idx = np.fromiter((zlib.crc32(g.encode("utf-8")) & (HASH_DIM - 1) for g in grams), dtype=np.int64)
+        X[row] = np.bincount(idx, minlength=HASH_DIM)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.maximum(norms, 1e-6)
+
+
+def _softmax(z):
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class IntentClassifier:
+    """Multinomial logistic regression over hashed char n-grams (NumPy only)"""
+
+    def __init__(self, labels=None, W=None, b=None):
+        self.labels = list(labels or [])
+        self.W = W
+        self.b = b
+
+    @property
+    def trained(self):
+        return self.W is not None
+
+    def fit(self, texts, labels, epochs=EPOCHS, lr=LEARNING_RATE, l2=L2):
+        self.labels = sorted(set(labels))
+        index = {label: i for i, label in enumerate(self.labels)}
+        X = featurize(texts)
+        Y = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        Y[np.arange(len(texts)), [index[label] for label in labels]] = 1.0
+        self.W = np.zeros((HASH_DIM, len(self.labels)), dtype=np.float32)
+        self.b = np.zeros(len(self.labels), dtype=np.float32)
+        for _ in range(epochs):
+            grad = (_softmax(X @ self.W + self.b) - Y) / len(texts)
+            self.W -= lr * (X.T @ grad + l2 * self.W)
+            self.b -= lr * grad.sum(axis=0)
+        return self
+
+    def predict_proba(self, texts):
+        return _softmax(featurize(texts) @ self.W + self.b)
+
+    def predict(self, text):
+        """(label, confidence)"""
+        probs = self.predict_proba([text])[0]
+        best = int(probs.argmax())
+        return self.labels[best], float(probs[best])
+
+    def save(self, path=MODEL_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(path, labels=np.array(self.labels), W=self.W, b=self.b)
+
+    @classmethod
+    def load(cls, path=MODEL_FILE):
+        data = np.load(path)
+        return cls([str(label) for label in data["labels"]], data["W"], data["b"])
+
+
+# ==========================================
+# TRAINING DATA
+# ==========================================
+
+def load_intents(path=INTENTS_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["intents"]
+
+
+def load_logged_examples(path=TRANSCRIPT_LOG):
+    """Transcripts that were given a 'label' field (hand-labelled log lines, rotated file included)"""
+    examples = []
+    for log in (path + ".1", path):
+        if not os.path.exists(log):
+            continue
+        with open(log, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("label") and entry.get("text"):
+                    examples.append((entry["text"], entry["label"]))
+    return examples
+
+
+def canned_responses(path=INTENTS_FILE):
+    """Every fixed reply in intents.json (pre-rendered into the TTS cache)"""
+    try:
+        intents = load_intents(path)
+    except (OSError, ValueError):
+        return []
+    return [r for spec in intents.values() for r in spec.get("responses", []) if r]
+
+
+def training_data(intents, log_path=TRANSCRIPT_LOG):
+    texts, labels = [], []
+    for label, spec in intents.items():
+        for example in spec.get("examples", []):
+            texts.append(example)
+            labels.append(label)
+    for text, label in load_logged_examples(log_path):
+        if label in intents:
+            texts.append(text)
+            labels.append(label)
+    return texts, labels
+
+
+def train(intents_file=INTENTS_FILE, log_path=TRANSCRIPT_LOG, model_file=MODEL_FILE):
+    """Fit on seed examples + labelled transcripts and save the model"""
+    t0 = time.monotonic()
+    texts, labels = training_data(load_intents(intents_file), log_path)
+    model = IntentClassifier().fit(texts, labels)
+    model.save(model_file)
+    print(f">>> 🧠 Intent classifier trained on {len(texts)} examples in {time.monotonic() - t0:.1f}s")
+    return model
+
+
+def log_transcript(text, stage, intent=None, confidence=None):
+    """Append an utterance to the transcript log (add a 'label' field by hand to train on it)"""
+    entry = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "text": text, "stage": stage}
+    if intent is not None:
+        entry["intent"] = intent
+        entry["confidence"] = round(confidence, 3)
+    try:
+        with _log_lock:
+            # bounded on the SD card: one previous generation is kept (and still used for training)
+            if os.path.exists(TRANSCRIPT_LOG) and os.path.getsize(TRANSCRIPT_LOG) > TRANSCRIPT_MAX_BYTES:
+                os.replace(TRANSCRIPT_LOG, TRANSCRIPT_LOG + ".1")
+            with open(TRANSCRIPT_LOG, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"❌ Lỗi ghi transcript: {e}")
+
+
+# ==========================================
+# RUNTIME ROUTER
+# ==========================================
+
+class IntentResponder:
+    """Classifier + canned responses; retrains when intents.json is newer than the saved model.
+
+    Nothing is read or trained at import: load() runs at startup, or on the first classify().
+    """
+
+    def __init__(self, threshold=INTENT_CONFIDENCE, robot_threshold=ROBOT_INTENT_CONFIDENCE):
+        self.threshold = threshold
+        self.robot_threshold = robot_threshold
+        self.intents = {}
+        self.model = None
+        self.loaded = False
+        self.last = None
+        self._load_lock = threading.Lock()
+        self._counters = {"classified": 0, "routed": 0, "low_confidence": 0}
+
+    def load(self):
+        with self._load_lock:
+            if self.loaded:
+                return self.model is not None
+            try:
+                self.intents = load_intents()
+                stale = (not os.path.exists(MODEL_FILE)
+                         or os.path.getmtime(MODEL_FILE) < os.path.getmtime(INTENTS_FILE))
+                self.model = train() if stale else IntentClassifier.load()
+                if set(self.model.labels) != set(self.intents):
+                    self.model = train()
+            except Exception as e:
+                print(f"❌ Intent classifier disabled: {e}")
+                self.model = None
+            self.loaded = True
+            return self.model is not None
+
+    def threshold_for(self, label):
+        """Intents that move the robot need more confidence ("lùi lịch họp lại" is not "lùi lại").
+
+        STOP keeps the normal threshold: a stray stop is harmless, a missed one is not.
+        """
+        action = self.intents.get(label, {}).get("robot")
+        if action and action["cmd"] != "STOP":
+            return self.robot_threshold
+        return self.threshold
+
+    def classify(self, text):
+        """(label, confidence) when a canned intent is confident enough, else None"""
+        if not self.loaded:
+            self.load()
+        if self.model is None:
+            return None
+        label, confidence = self.model.predict(text)
+        self.last = (label, confidence)
+        self._counters["classified"] += 1
+        if label == OTHER:
+            return None
+        if confidence < self.threshold_for(label):
+            self._counters["low_confidence"] += 1
+            return None
+        self._counters["routed"] += 1
+        return label, confidence
+
+    def response(self, label):
+        """(text to speak, robot action dict or None)"""
+        spec = self.intents.get(label, {})
+        responses = spec.get("responses") or [""]
+        return random.choice(responses), spec.get("robot")
+
+    def stats(self):
+        return dict(
+            self._counters,
+            threshold=self.threshold,
+            robot_threshold=self.robot_threshold,
+            labels=self.model.labels if self.model else [],
+            last=self.last,
+        )
+
+
+intent_responder = IntentResponder()
+metrics.register_source("intent_classifier", intent_responder.stats)
@@ -0,0 +1,78 @@
+import time
+
+import metrics
+
+# ==========================================
+# INTENT ROUTER CONFIGURATION
+# ==========================================
+STOP = "stop"   # handler result that ends the voice loop
+
+
+class IntentStage:
+    """One path: cheap predicate(text) -> match (falsy = not mine), async handler(text, match)"""
+
+    def __init__(self, name, predicate, handler, cost):
+        self.name = name
+        self.predicate = predicate
+        self.handler = handler
+        self.cost = cost
+        self.checked = 0
+        self.hits = 0
+
+
+class IntentRouter:
+    """Runs stages in cost order and stops at the first predicate that matches"""
+
+    def __init__(self):
+        self.stages = []
+        self.total = 0
+        self.fallthrough = 0
+
+    def add(self, name, predicate, handler, cost=0):
+        self.stages.append(IntentStage(name, predicate, handler, cost))
+        self.stages.sort(key=lambda s: s.cost)   # stable: equal costs keep registration order
+        return handler
+
+    def stage(self, name, predicate, cost=0):
+        """Decorator form of add()"""
+        def register(handler):
+            return self.add(name, predicate, handler, cost)
+        return register
+
+    async def route(self, text):
+        """(stage name, handler result) of the first matching stage; (None, None) if nothing matched"""
+        self.total += 1
+        for stage in self.stages:
+            t0 = time.perf_counter()
+            match = stage.predicate(text)
+            metrics.record_latency(f"intent_check_{stage.name}", time.perf_counter() - t0)
+            stage.checked += 1
+            if not match:
+                continue
+
+            stage.hits += 1
+            t0 = time.perf_counter()
+            try:
+                result = await stage.handler(text, match)
+            finally:
+                metrics.record_latency(f"intent_handle_{stage.name}", time.perf_counter() - t0)
+            return stage.name, result
+
+        self.fallthrough += 1
+        return None, None
+
+    def stats(self):
+        return {
+            "utterances": self.total,
+            "fallthrough": self.fallthrough,
+            "stages": [
+                {
+                    "name": s.name,
+                    "cost": s.cost,
+                    "checked": s.checked,
+                    "hits": s.hits,
+                    "hit_rate": round(s.hits / self.total, 3) if self.total else 0.0,
+                }
+                for s in self.stages
+            ],
+        }
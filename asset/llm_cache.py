@@ -0,0 +1,159 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import globals
+
+# ==========================================
+# LLM RESPONSE CACHE CONFIGURATION
+# ==========================================
+LLM_CACHE_FILE = os.getenv('LLM_CACHE_FILE', os.path.join(globals.BASE_DIR, "llm_cache.db"))
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))       # seconds an answer stays valid
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '2000'))
+HIT_FLUSH_EVERY = 32            # hit bookkeeping is batched so a hit costs one indexed read
+# answers that go stale with the clock or the news are never cached
+TIME_SENSITIVE_WORDS = [
+    "hôm nay", "hôm qua", "ngày mai", "bây giờ", "hiện tại", "hiện nay", "mới nhất", "gần đây",
+    "tuần này", "tháng này", "năm nay", "giá", "tỷ số", "kết quả", "thời tiết", "tin tức",
+]
+# follow-ups only make sense with the conversation around them
+FOLLOWUP_WORDS = ["nó", "đó", "ấy", "vậy", "thế còn", "còn thì", "tiếp đi", "nữa", "lúc nãy", "vừa rồi"]
+WAKE_PREFIX = re.compile(r"^(hanah|hana)( ơi)?\s+")
+
+
+def _word_pattern(words):
+    return re.compile(r"\b(?:" + "|".join(re.escape(w) for w in words) + r")\b")
+
+
+_TIME_SENSITIVE = _word_pattern(TIME_SENSITIVE_WORDS)
+_FOLLOWUP = _word_pattern(FOLLOWUP_WORDS)
+
+
+def normalize_prompt(text):
+    """'Hanah ơi, em là ai?' -> 'em là ai'"""
+    t = re.sub(r"[\W_]+", " ", text.lower()).strip()
+    return WAKE_PREFIX.sub("", t)
+
+
+def cacheable(text):
+    """False for time-sensitive or context-dependent prompts"""
+    t = normalize_prompt(text)
+    return bool(t) and not _TIME_SENSITIVE.search(t) and not _FOLLOWUP.search(t)
+
+
+class LLMResponseCache:
+    """SQLite cache of LLM answers keyed by model + system prompt hash + normalized user text, LRU evicted"""
+
+    def __init__(self, path=LLM_CACHE_FILE, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.skipped = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._pending_hits = {}   # key -> (last hit, count) not yet written
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # WAL + NORMAL: writes do not wait on fsync
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, prompt TEXT, response TEXT,"
+            " created REAL, last_hit REAL, hits INTEGER DEFAULT 0)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_hit ON responses(last_hit)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(model, system_prompt, user_text):
+        system_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        raw = "\x1f".join([model, system_hash, normalize_prompt(user_text)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, model, system_prompt, user_text):
+        """Cached answer or None; time-sensitive / follow-up prompts always miss"""
+        if not cacheable(user_text):
+            self.skipped += 1
+            return None
+        key = self.make_key(model, system_prompt, user_text)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, created = row
+            if now - created > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self.expired += 1
+                self.misses += 1
+                return None
+            _, count = self._pending_hits.get(key, (now, 0))
+            self._pending_hits[key] = (now, count + 1)
+            if len(self._pending_hits) >= HIT_FLUSH_EVERY:
+                self._flush_hits()
+                self._db.commit()
+            self.hits += 1
+        return response
+
+    def _flush_hits(self):
+        self._db.executemany(
+            "UPDATE responses SET last_hit = ?, hits = hits + ? WHERE key = ?",
+            [(t, n, key) for key, (t, n) in self._pending_hits.items()]
+        )
+        self._pending_hits.clear()
+
+    def put(self, model, system_prompt, user_text, response):
+        if not response.strip() or not cacheable(user_text):
+            return False
+        key = self.make_key(model, system_prompt, user_text)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, prompt, response, created, last_hit, hits)"
+                " VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, model, normalize_prompt(user_text), response, now, now)
+            )
+            self._evict(now)
+            self._db.commit()
+        return True
+
+    def _evict(self, now):
+        self._flush_hits()   # LRU order needs the latest hits
+        cur = self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        self.evictions += cur.rowcount
+        (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            cur = self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_hit LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            self.evictions += cur.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._pending_hits.clear()
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "expired": self.expired,
+            "skipped": self.skipped,
+            "evictions": self.evictions,
+        }
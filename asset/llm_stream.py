@@ -0,0 +1,181 @@
+import asyncio
+import re
+import time
+
+import ollama
+
+import metrics
+
+# ==========================================
+# LLM STREAMING CONFIGURATION
+# ==========================================
+MIN_CHUNK_CHARS = 12      # shorter fragments wait for the next sentence end
+MAX_CHUNK_CHARS = 140     # a run-on sentence is cut at a comma / space past this
+COLD_LOAD_SECONDS = 1.0   # load_duration above this means the turn had to load the weights
+_HARD_BREAK = re.compile(r"[.!?…;:]+(?=\s)|\n+")
+
+
+class SentenceChunker:
+    """Cuts a token stream into speakable chunks as soon as a sentence ends"""
+
+    def __init__(self, min_chars=MIN_CHUNK_CHARS, max_chars=MAX_CHUNK_CHARS):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.buf = ""
+
+    def _cut(self):
+        for m in _HARD_BREAK.finditer(self.buf):
+            if len(self.buf[:m.end()].strip()) >= self.min_chars:
+                return m.end()
+        if len(self.buf) > self.max_chars:
+            for sep in (",", " "):
+                idx = self.buf.rfind(sep, self.min_chars, self.max_chars)
+                if idx > 0:
+                    return idx + 1
+            return self.max_chars
+        return None
+
+    def feed(self, token):
+        """Chunks completed by this token"""
+        self.buf += token
+        chunks = []
+        while True:
+            cut = self._cut()
+            if cut is None:
+                return chunks
+            chunk, self.buf = self.buf[:cut].strip(), self.buf[cut:]
+            if chunk:
+                chunks.append(chunk)
+
+    def flush(self):
+        rest, self.buf = self.buf.strip(), ""
+        return rest
+
+
+class LLMReply:
+    """One streamed turn: generation runs as a task, sentences() yields chunks as they are cut"""
+
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self.first_token_at = None
+        self.parts = []
+        self.final = None          # last stream message (token counts / durations)
+        self.error = None
+        self.task = None
+        self._chunks = asyncio.Queue()
+
+    @property
+    def ttft(self):
+        return None if self.first_token_at is None else self.first_token_at - self.t0
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    async def sentences(self):
+        while True:
+            chunk = await self._chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    async def wait(self):
+        """Full reply text once generation has finished"""
+        if self.task is not None:
+            await asyncio.shield(self.task)
+        return self.text
+
+    def cancel(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+
+class LLMStreamer:
+    """Streams ollama chat tokens and hands finished sentences to speech while generation continues"""
+
+    def __init__(self, model, options=None):
+        self.model = model
+        self.options = options
+        self.keep_alive = None    # callable(turn=True) -> ollama keep_alive for the next request (ModelManager)
+        self._client = None
+        self._counters = {"turns": 0, "errors": 0, "cancelled": 0, "cold_starts": 0}
+        self.last = {}
+
+    def client(self):
+        if self._client is None:
+            self._client = ollama.AsyncClient()
+        return self._client
+
+    def start(self, messages):
+        """Begin generating on the running loop; returns the LLMReply immediately"""
+        reply = LLMReply()
+        reply.task = asyncio.ensure_future(self._generate(messages, reply))
+        self._counters["turns"] += 1
+        return reply
+
+    async def complete(self, messages, options=None):
+        """Whole reply in one call (background jobs such as summaries, not spoken turns)"""
+        keep_alive = self.keep_alive(turn=False) if self.keep_alive else None
+        res = await self.client().chat(
+            model=self.model, messages=messages, stream=False, options=options, keep_alive=keep_alive
+        )
+        return res['message']['content']
+
+    async def _generate(self, messages, reply):
+        chunker = SentenceChunker()
+        try:
+            keep_alive = self.keep_alive() if self.keep_alive else None
+            stream = await self.client().chat(
+                model=self.model, messages=messages, stream=True, options=self.options, keep_alive=keep_alive
+            )
+            async for part in stream:
+                token = part['message']['content'] or ""
+                if token and reply.first_token_at is None:
+                    reply.first_token_at = time.monotonic()
+                    metrics.record_latency("llm_ttft", reply.ttft)
+                    print(f">>> ⏱️ LLM first token: {reply.ttft * 1000:.0f} ms")
+                reply.parts.append(token)
+                for chunk in chunker.feed(token):
+                    reply._chunks.put_nowait(chunk)
+                if part.get('done'):
+                    reply.final = part
+            rest = chunker.flush()
+            if rest:
+                reply._chunks.put_nowait(rest)
+        except asyncio.CancelledError:
+            self._counters["cancelled"] += 1
+            raise
+        except Exception as e:
+            reply.error = e
+            self._counters["errors"] += 1
+            print(f"AI chat error: {e}")
+        finally:
+            reply._chunks.put_nowait(None)
+            self._record(reply)
+
+    def _record(self, reply):
+        total = time.monotonic() - reply.t0
+        metrics.record_latency("llm_total", total)
+        final = reply.final or {}
+        eval_count = final.get('eval_count') or 0
+        eval_ns = final.get('eval_duration') or 0
+        prompt_ns = final.get('prompt_eval_duration') or 0
+        load_ns = final.get('load_duration') or 0
+        if load_ns / 1e9 > COLD_LOAD_SECONDS:
+            self._counters["cold_starts"] += 1
+            metrics.record_latency("llm_cold_start", load_ns / 1e9)
+        if prompt_ns:
+            # stays flat while the conversation prefix is reused from ollama's cache
+            metrics.record_latency("llm_prompt_eval", prompt_ns / 1e9)
+        self.last = {
+            "ttft_ms": None if reply.ttft is None else round(reply.ttft * 1000),
+            "total_ms": round(total * 1000),
+            "prompt_eval_tokens": final.get('prompt_eval_count') or 0,
+            "prompt_eval_ms": round(prompt_ns / 1e6),
+            "load_ms": round(load_ns / 1e6),
+            "tokens": eval_count,
+            "tokens_per_s": round(eval_count / (eval_ns / 1e9), 1) if eval_ns else None,
+        }
+
+    def stats(self):
+        return dict(self._counters, model=self.model, last=self.last)
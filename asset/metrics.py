@@ -0,0 +1,68 @@
+import threading
+from collections import defaultdict, deque
+
+# ==========================================
+# VOICE PIPELINE METRICS
+# ==========================================
+MAX_SAMPLES = 500
+
+_lock = threading.Lock()
+_latencies = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+_counters = defaultdict(int)
+_sources = {}
+
+
+def record_latency(name, seconds):
+    """Store one latency sample (seconds) under a metric name"""
+    with _lock:
+        _latencies[name].append(seconds)
+
+
+def incr(name, n=1):
+    with _lock:
+        _counters[name] += n
+
+
+def register_source(name, fn):
+    """Attach a callable whose dict result is included in every snapshot"""
+    with _lock:
+        _sources[name] = fn
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def summarize(values):
+    """Count / last / percentiles in milliseconds for a list of second samples"""
+    ordered = sorted(values)
+    ms = lambda v: None if v is None else round(v * 1000, 1)
+    return {
+        "count": len(ordered),
+        "last": ms(values[-1]) if values else None,
+        "p50": ms(_percentile(ordered, 50)),
+        "p90": ms(_percentile(ordered, 90)),
+        "p99": ms(_percentile(ordered, 99)),
+        "max": ms(ordered[-1]) if ordered else None,
+    }
+
+
+def snapshot():
+    with _lock:
+        latencies = {name: list(values) for name, values in _latencies.items()}
+        counters = dict(_counters)
+        sources = dict(_sources)
+
+    result = {
+        "latency_ms": {name: summarize(values) for name, values in latencies.items()},
+        "counters": counters,
+    }
+    for name, fn in sources.items():
+        try:
+            result[name] = fn()
+        except Exception as e:
+            result[name] = {"error": str(e)}
+    return result
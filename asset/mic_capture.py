@@ -0,0 +1,237 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+import globals
+import metrics
+import vad
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+# ==========================================
+# MICROPHONE CAPTURE CONFIGURATION
+# ==========================================
+MIC_RATE = int(os.getenv('MIC_RATE', '16000'))
+FRAME_MS = 20
+RING_SECONDS = 30
+PREROLL_SECONDS = 0.3          # audio kept before the detected speech onset
+FLOOR_INIT = 300.0             # initial noise floor (RMS, int16 scale)
+FLOOR_ADAPT = 0.05             # EWMA weight for quiet frames
+FLOOR_RISE = 1.002             # slow upward drift so the floor can follow rising noise
+SPEECH_FACTOR = vad.ENERGY_FACTOR   # frames louder than floor * factor do not update the floor
+
+
+class PyAudioSource:
+    """INMP441 (or any ALSA input) through PyAudio, opened once"""
+
+    def __init__(self, device_index, rate, frame_len):
+        self.device_index = device_index
+        self.rate = rate
+        self.frame_len = frame_len
+        self._pa = None
+        self._stream = None
+
+    def open(self):
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(
+            format=pyaudio.paInt16, channels=1, rate=self.rate, input=True,
+            input_device_index=self.device_index, frames_per_buffer=self.frame_len
+        )
+
+    def read(self):
+        data = self._stream.read(self.frame_len, exception_on_overflow=False)
+        return np.frombuffer(data, dtype=np.int16)
+
+    def close(self):
+        try:
+            if self._stream:
+                self._stream.stop_stream()
+                self._stream.close()
+            if self._pa:
+                self._pa.terminate()
+        finally:
+            self._stream = None
+            self._pa = None
+
+
+class MicCapture:
+    """Always-on capture thread: ring buffer of frames + continuously updated noise floor"""
+
+    def __init__(self, device_index=0, rate=MIC_RATE, source=None, floor_frozen=None):
+        self.rate = rate
+        self.frame_len = int(rate * FRAME_MS / 1000)
+        self.capacity = int(RING_SECONDS * 1000 / FRAME_MS)
+        self.source = source or PyAudioSource(device_index, rate, self.frame_len)
+        # callable -> True while the floor must not learn (e.g. robot is talking)
+        self.floor_frozen = floor_frozen or (lambda: False)
+        self.noise_floor = FLOOR_INIT
+        self.overruns = 0
+        self._ring = np.zeros((self.capacity, self.frame_len), dtype=np.int16)
+        self._rms = np.zeros(self.capacity, dtype=np.float32)
+        self._ts = np.zeros(self.capacity, dtype=np.float64)   # monotonic capture time per frame
+        self._written = 0      # total frames captured so far
+        self.last_span = (0, 0)   # ring frames [start, end) of the last utterance
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.enabled = lambda: globals.SYSTEM_CONFIG.get("mic", True)
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+
+    # ---------- capture thread ----------
+    def _run(self):
+        opened = False
+        while self._running and not globals.STOP_EVENT.is_set():
+            if not self.enabled():
+                if opened:
+                    self.source.close()
+                    opened = False
+                time.sleep(0.2)
+                continue
+            try:
+                if not opened:
+                    self.source.open()
+                    opened = True
+                frame = self.source.read()
+                if frame is None:
+                    break  # finite source (file replay) is exhausted
+                self._push(frame)
+            except Exception as e:
+                print(f"Mic capture error: {e}")
+                metrics.incr("mic_errors")
+                try:
+                    self.source.close()
+                except Exception:
+                    pass
+                opened = False
+                time.sleep(0.5)
+        if opened:
+            self.source.close()
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def _push(self, frame):
+        if len(frame) != self.frame_len:
+            frame = np.resize(frame, self.frame_len)
+        x = frame.astype(np.float32)
+        # same quantity the VAD compares against the floor: RMS without the mic's DC offset
+        rms = float(np.sqrt(np.mean((x - x.mean()) ** 2)))
+        self._update_floor(rms)
+        with self._cond:
+            idx = self._written % self.capacity
+            self._ring[idx] = frame
+            self._rms[idx] = rms
+            self._ts[idx] = time.monotonic()
+            self._written += 1
+            self._cond.notify_all()
+
+    def _update_floor(self, rms):
+        if self.floor_frozen():
+            return
+        if rms < self.noise_floor * SPEECH_FACTOR:
+            self.noise_floor += FLOOR_ADAPT * (rms - self.noise_floor)
+        else:
+            self.noise_floor *= FLOOR_RISE
+        self.noise_floor = max(self.noise_floor, 1.0)
+
+    # ---------- readers ----------
+    @property
+    def speech_threshold(self):
+        return max(self.noise_floor * SPEECH_FACTOR, vad.MIN_SPEECH_RMS)
+
+    def cursor(self):
+        with self._cond:
+            return self._written
+
+    def read_batch(self, cursor, timeout):
+        """Every frame from #cursor up to now as (frames, timestamps, first_index); None on timeout"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._written <= cursor:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    return None
+                self._cond.wait(remaining)
+            first = max(cursor, self._written - self.capacity)
+            if first != cursor:
+                self.overruns += 1
+            idx = np.arange(first, self._written) % self.capacity
+            return self._ring[idx].copy(), self._ts[idx].copy(), first
+
+    def frames(self, start, end):
+        """Copy of frames [start, end) still held in the ring"""
+        with self._cond:
+            start = max(start, self._written - self.capacity, 0)
+            end = min(end, self._written)
+            if end <= start:
+                return np.zeros(0, dtype=np.int16)
+            idx = np.arange(start, end) % self.capacity
+            return self._ring[idx].reshape(-1).copy()
+
+    def get_utterance(self, timeout=5, phrase_time_limit=8, on_audio=None, start=None):
+        """Next spoken phrase as int16 PCM (None if nobody spoke before timeout).
+
+        on_audio(pcm) receives the phrase incrementally while it is still being spoken.
+        start = ring cursor to read from (default: now); frames already captured are used first.
+        """
+        self.start()
+        cursor = self.cursor() if start is None else start
+        wait_until = time.monotonic() + timeout
+        endpointer = vad.Endpointer(
+            FRAME_MS,
+            max_frames=int(phrase_time_limit * 1000 / FRAME_MS),
+            preroll_frames=int(PREROLL_SECONDS * 1000 / FRAME_MS),
+            min_start=cursor,
+        )
+        sent = None   # frames already handed to on_audio
+
+        while True:
+            if not endpointer.started and time.monotonic() > wait_until:
+                return None
+            batch = self.read_batch(cursor, 0.5)
+            if batch is None:
+                if not self._running:
+                    return None
+                continue
+            frames, timestamps, first = batch
+            features = vad.frame_features(frames, self.rate)
+            flags = vad.classify(features, self.noise_floor)
+            cursor = first + len(frames)
+
+            ended = endpointer.feed(flags, first, timestamps, features)
+            if on_audio is not None and endpointer.started:
+                upto = endpointer.end if ended else cursor
+                begin = endpointer.start if sent is None else sent
+                if upto > begin:
+                    on_audio(self.frames(begin, upto))
+                    sent = upto
+
+            if ended:
+                record = vad.report_endpoint(endpointer, self.noise_floor)
+                print(f">>> ⏱️ VAD endpoint: {record['endpoint_latency_ms']} ms")
+                self.last_span = (endpointer.start, endpointer.end)
+                return self.frames(endpointer.start, endpointer.end)
+
+    def stats(self):
+        return {
+            "noise_floor": round(self.noise_floor, 1),
+            "speech_threshold": round(self.speech_threshold, 1),
+            "frames_captured": self._written,
+            "overruns": self.overruns,
+            "running": self._running,
+        }
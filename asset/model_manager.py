@@ -0,0 +1,151 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+import globals
+import metrics
+from http_client import sleep_unless_stopped
+from system_logs import add_system_log
+
+# ==========================================
+# MODEL LIFECYCLE CONFIGURATION
+# ==========================================
+KEEP_ALIVE_BOOT = "15m"         # after startup / re-enabling AI
+KEEP_ALIVE_IDLE = "5m"          # a one-off question
+KEEP_ALIVE_ACTIVE = "30m"       # an ongoing conversation
+ACTIVE_WINDOW = 600             # seconds; two turns inside it count as a conversation
+LLM_MIN_FREE_MB = int(os.getenv('LLM_MIN_FREE_MB', '250'))    # unload below this much available RAM
+MODEL_CHECK_INTERVAL = 15
+TURN_GRACE = 60                 # seconds after a turn starts before ps() is trusted again
+MAX_EVENTS = 20
+EVENT_LABELS = {"load": "đã nạp", "unload": "đã giải phóng"}
+
+
+def mem_available_mb():
+    """MemAvailable from /proc/meminfo, None off Linux"""
+    try:
+        with open("/proc/meminfo", 'r') as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+class ModelManager:
+    """Keeps LOCAL_MODEL resident while it is useful: preload, activity-based keep_alive, unload on pressure / AI off"""
+
+    def __init__(self, llm, min_free_mb=LLM_MIN_FREE_MB):
+        self.llm = llm
+        self.model = llm.model
+        self.min_free_mb = min_free_mb
+        self.loaded = False
+        self.last_load_ms = None
+        self._turns = deque(maxlen=2)
+        self._reload_reason = "khởi động"     # load at the next check (boot / AI switched back on)
+        self._task = None
+        self._events = deque(maxlen=MAX_EVENTS)
+        self._counters = {"loads": 0, "unloads": 0, "expired": 0, "load_errors": 0}
+
+    def _event(self, event, reason, ms=None):
+        self._events.append({"time": time.strftime("%H:%M:%S"), "event": event, "reason": reason, "ms": ms})
+        detail = f" ({ms} ms)" if ms is not None else ""
+        message = f"Mô hình {self.model} {EVENT_LABELS[event]}: {reason}{detail}"
+        print(f">>> 🧠 {message}")
+        add_system_log(message, "info", "AI")
+
+    # ---------- keep_alive ----------
+    def keep_alive(self, turn=True):
+        """keep_alive for the request about to start; turn=False for background calls (summaries)
+
+        Every request must carry it: one sent without resets the server to ollama's default 5m.
+        """
+        now = time.monotonic()
+        if turn:
+            self._turns.append(now)
+        self.loaded = True
+        conversation = len(self._turns) == 2 and now - self._turns[0] < ACTIVE_WINDOW
+        return KEEP_ALIVE_ACTIVE if conversation else KEEP_ALIVE_IDLE
+
+    # ---------- load / unload ----------
+    async def preload(self, reason="khởi động"):
+        """Load the weights now (an empty generate) so the first question does not pay for it"""
+        t0 = time.monotonic()
+        try:
+            await self.llm.client().generate(model=self.model, prompt="", keep_alive=KEEP_ALIVE_BOOT)
+        except Exception as e:
+            self._counters["load_errors"] += 1
+            print(f"❌ Không nạp được mô hình {self.model}: {e}")
+            return False
+        elapsed = time.monotonic() - t0
+        metrics.record_latency("llm_preload", elapsed)
+        self.loaded = True
+        self.last_load_ms = round(elapsed * 1000)
+        self._counters["loads"] += 1
+        self._event("load", reason, self.last_load_ms)
+        return True
+
+    async def unload(self, reason):
+        try:
+            await self.llm.client().generate(model=self.model, prompt="", keep_alive=0)
+        except Exception as e:
+            print(f"❌ Không giải phóng được mô hình {self.model}: {e}")
+            return False
+        self.loaded = False
+        self._counters["unloads"] += 1
+        self._event("unload", reason)
+        return True
+
+    async def _refresh_loaded(self):
+        """Sync with ollama ps: the server unloads on its own when keep_alive runs out"""
+        if self._turns and time.monotonic() - self._turns[-1] < TURN_GRACE:
+            return   # a turn may still be loading the weights
+        try:
+            res = await self.llm.client().ps()
+        except Exception:
+            return
+        names = {m.get('model') or m.get('name') for m in res['models']}
+        loaded = self.model in names
+        if self.loaded and not loaded:
+            self._counters["expired"] += 1
+            self._event("unload", "hết keep_alive")
+        self.loaded = loaded
+
+    # ---------- monitor ----------
+    async def _run(self):
+        while not globals.STOP_EVENT.is_set():
+            await self._refresh_loaded()
+            free_mb = mem_available_mb()
+            if not globals.SYSTEM_CONFIG.get("ai", True):
+                if self.loaded:
+                    await self.unload("AI tắt")
+                self._reload_reason = "AI bật lại"
+            elif self._reload_reason:
+                if self.loaded:
+                    self._reload_reason = None      # a turn already loaded it
+                elif free_mb is None or free_mb >= self.min_free_mb:
+                    # ollama may not be up yet at boot: keep the reason and retry next check
+                    if await self.preload(self._reload_reason):
+                        self._reload_reason = None
+            elif self.loaded and free_mb is not None and free_mb < self.min_free_mb:
+                # the next question reloads it (a cold start) once memory is back
+                await self.unload(f"thiếu RAM ({free_mb} MB trống)")
+            await sleep_unless_stopped(MODEL_CHECK_INTERVAL)
+
+    def start(self):
+        """Schedule the monitor (first pass preloads the model) on the running loop"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def stats(self):
+        return dict(
+            self._counters,
+            model=self.model,
+            loaded=self.loaded,
+            last_load_ms=self.last_load_ms,
+            mem_available_mb=mem_available_mb(),
+            events=list(self._events),
+        )
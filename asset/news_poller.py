@@ -0,0 +1,165 @@
+import asyncio
+import os
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
+
+import globals
+import metrics
+from http_client import http, sleep_unless_stopped
+
+# ==========================================
+# RSS NEWS CONFIGURATION
+# ==========================================
+RSS_FEEDS = {
+    "thời sự": "https://vnexpress.net/rss/thoi-su.rss",
+    "thế giới": "https://vnexpress.net/rss/the-gioi.rss",
+    "pháp luật": "https://vnexpress.net/rss/phap-luat.rss",
+    "công nghệ": "https://vnexpress.net/rss/khoa-hoc-cong-nghe.rss",
+    "kinh doanh": "https://vnexpress.net/rss/kinh-doanh.rss"
+}
+DEFAULT_CATEGORY = "thời sự"
+NEWS_POLL_INTERVAL = int(os.getenv('NEWS_POLL_INTERVAL', '600'))   # seconds between conditional GETs
+HEADLINES_PER_FEED = 10
+HEADLINES_SPOKEN = 3
+CATEGORY_ALIASES = {
+    "thời sự": ["thời sự", "trong nước", "tin tức", "tin mới", "có tin gì"],
+    "thế giới": ["thế giới", "quốc tế", "nước ngoài"],
+    "pháp luật": ["pháp luật", "an ninh"],
+    "công nghệ": ["công nghệ", "khoa học"],
+    "kinh doanh": ["kinh doanh", "kinh tế", "chứng khoán"],
+}
+# "tin" alone is also the verb "believe" ("em có tin là ..."): only these noun phrases mean news
+NEWS_PHRASES = ["tin tức", "bản tin", "tin mới", "tin nóng", "có tin gì", "thời sự"]
+
+
+class Headline:
+    __slots__ = ("title", "link", "published")
+
+    def __init__(self, title, link, published):
+        self.title = title
+        self.link = link
+        self.published = published
+
+
+def parse_rss(data, limit=HEADLINES_PER_FEED):
+    """RSS 2.0 bytes -> newest-first list of Headline"""
+    root = ET.fromstring(data)
+    headlines = []
+    for item in root.iter("item"):
+        title = re.sub(r"\s+", " ", item.findtext("title", "")).strip()
+        if not title:
+            continue
+        published = 0.0
+        try:
+            published = parsedate_to_datetime(item.findtext("pubDate", "")).timestamp()
+        except (TypeError, ValueError):
+            pass
+        headlines.append(Headline(title, item.findtext("link", "").strip(), published))
+    headlines.sort(key=lambda h: h.published, reverse=True)
+    return headlines[:limit]
+
+
+class NewsPoller:
+    """Background RSS poller: conditional GETs (ETag / Last-Modified) into an in-memory headline index"""
+
+    def __init__(self, feeds=RSS_FEEDS, interval=NEWS_POLL_INTERVAL):
+        self.feeds = dict(feeds)
+        self.interval = interval
+        self.index = {}           # category -> [Headline]
+        self.updated_at = {}      # category -> wall time of the last change
+        self._validators = {}     # category -> {"etag": ..., "last_modified": ...}
+        self._lock = threading.Lock()
+        self._task = None
+        self._counters = {"polls": 0, "updated": 0, "not_modified": 0, "errors": 0}
+
+    async def poll_feed(self, category):
+        """One conditional GET; True if the index changed"""
+        url = self.feeds[category]
+        validators = self._validators.get(category, {})
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        self._counters["polls"] += 1
+        try:
+            res = await http.get("news", url, headers=headers)
+            if res.status == 304:
+                self._counters["not_modified"] += 1
+                return False
+            if res.status >= 400:
+                raise ValueError(f"HTTP {res.status}")
+            headlines = parse_rss(res.body)
+        except Exception as e:
+            self._counters["errors"] += 1
+            print(f"Lỗi RSS {category}: {e!r}")
+            return False
+
+        self._validators[category] = {
+            "etag": res.headers.get("ETag"),
+            "last_modified": res.headers.get("Last-Modified"),
+        }
+        with self._lock:
+            self.index[category] = headlines
+            self.updated_at[category] = time.time()
+        self._counters["updated"] += 1
+        return True
+
+    async def poll_all(self):
+        """Every feed concurrently (bounded by the 'news' provider limit)"""
+        await asyncio.gather(*(self.poll_feed(c) for c in self.feeds))
+
+    async def _run(self):
+        while not globals.STOP_EVENT.is_set():
+            await self.poll_all()
+            await sleep_unless_stopped(self.interval)
+
+    def start(self):
+        """Schedule the poll task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def headlines(self, category, n=HEADLINES_SPOKEN):
+        with self._lock:
+            return list(self.index.get(category, []))[:n]
+
+    def stats(self):
+        with self._lock:
+            sizes = {c: len(h) for c, h in self.index.items()}
+        return dict(self._counters, headlines=sizes)
+
+
+def _alternation(words):
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+_CATEGORY_OF = {alias: category for category, aliases in CATEGORY_ALIASES.items() for alias in aliases}
+# "tin công nghệ", "bản tin thế giới", "tin tức về kinh tế": the category right after the news noun
+_NEWS_OF_CATEGORY = re.compile(
+    r"\b(?:bản tin|tin tức|tin)(?: mới| nóng)?(?: về| mảng)? (" + _alternation(_CATEGORY_OF) + r")\b"
+)
+_NEWS_PHRASE = re.compile(r"\b(?:" + _alternation(NEWS_PHRASES) + r")\b")
+
+
+def detect_news_request(user_text):
+    """Category for 'tin thời sự' / 'có tin gì mới' style questions, else None"""
+    t = re.sub(r"[\W_]+", " ", user_text.lower())
+    m = _NEWS_OF_CATEGORY.search(t)
+    if m:
+        return _CATEGORY_OF[m.group(1)]
+    if not _NEWS_PHRASE.search(t):
+        return None
+    # a news phrase was said: a category word elsewhere only narrows it ("có tin gì mới về chứng khoán")
+    for category, aliases in CATEGORY_ALIASES.items():
+        if category != DEFAULT_CATEGORY and any(re.search(rf"\b{re.escape(a)}\b", t) for a in aliases):
+            return category
+    return DEFAULT_CATEGORY
+
+
+news = NewsPoller()
+metrics.register_source("news", news.stats)
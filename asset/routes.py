@@ -4,7 +4,6 @@ import cv2
 import logging
 import numpy as np
 import psutil      
-import subprocess  
 import threading
 from datetime import timedelta
 from flask import Flask, request, redirect, url_for, session, render_template, jsonify, Response
@@ -12,16 +11,15 @@ from system_logs import get_cpu_temperature, get_power_status, get_disk_usage, a
 from system_logs import load_system_config, load_system_logs, SYSTEM_CONFIG, SYSTEM_LOGS
 from uart_handle import robot
 from mqtt_handler import mqtt_client, TOPIC_CMD
+from audio_codec import decode_audio
+from audio_service import audio_service, OUTPUT_RATE, PRIORITY_REMOTE
+from speech_scheduler import speech
+from stt_backends import STT_MODES
+from device_registry import registry
+import metrics
 import globals
 from globals import BASE_DIR, CONFIG_FILE, LOG_FILE, file_lock, STOP_EVENT
 
-try:
-    from ai_module import _play_wav_blocking
-except ImportError:
-    # Hàm dự phòng nếu không import được
-    def _play_wav_blocking(path):
-        subprocess.run(['/usr/bin/aplay', '-D', 'plughw:2,0', path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
 ROOT_DIR = os.path.dirname(globals.BASE_DIR)
 
 app = Flask(
@@ -169,6 +167,13 @@ def system_stats():
         print(f"Stats Error: {e}")
         return jsonify({"error": "Internal Error"}), 500
 
+@app.route('/api/voice-metrics')
+def voice_metrics():
+    """Voice pipeline latency / counter snapshot"""
+    if not session.get('logged_in'):
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(metrics.snapshot())
+
 # 2. Thêm Route để mở trang log
 @app.route('/logs')
 def log_page():
@@ -225,6 +230,20 @@ def toggle_system(target, action):
     
     return jsonify({"error": "Invalid target"}), 400
 
+
+@app.route('/api/stt-backend/<mode>', methods=['POST'])
+def set_stt_backend(mode):
+    """Pick the speech recognizer: auto (offline first) / vosk / google"""
+    if not session.get('logged_in'):
+        return jsonify({"error": "Unauthorized"}), 401
+    if mode not in STT_MODES:
+        return jsonify({"error": "Invalid STT backend"}), 400
+
+    globals.SYSTEM_CONFIG["stt"] = mode
+    save_system_config()
+    add_system_log(f"Đã chuyển nhận dạng giọng nói sang {mode.upper()}", "info", "STT")
+    return jsonify({"status": "success", "stt": mode})
+
 @app.route('/api/move', methods=['POST'])
 def api_move():
     """Robot movement API"""
@@ -242,7 +261,11 @@ def control_relay_web(relay, state):
         return jsonify({"error": "Unauthorized"}), 401
     
     # 1. Gửi lệnh MQTT
-    mqtt_client.publish(TOPIC_CMD, f"{relay}:{state}")
+    device = registry.get(relay)
+    if device:
+        mqtt_client.publish(device.topic, device.payload(state))
+    else:
+        mqtt_client.publish(TOPIC_CMD, f"{relay}:{state}")
     
     # 2. Ghi System Log
     log_msg = f"Web UI: Đã { 'BẬT' if state == 'on' else 'TẮT' } thiết bị số {relay}"
@@ -250,38 +273,42 @@ def control_relay_web(relay, state):
     
     return jsonify({"status": "success", "device": relay, "state": state})
 
+@app.route('/api/devices/batch', methods=['POST'])
+def control_devices_batch():
+    """Several relay commands in one MQTT message: {"commands": [{"id": "1", "state": "on"}, ...]}"""
+    if not session.get('logged_in'):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    data = request.get_json(silent=True) or {}
+    commands = []
+    for item in data.get("commands", []):
+        device_id, state = str(item.get("id")), item.get("state")
+        if registry.get(device_id) is None or state not in ("on", "off"):
+            return jsonify({"error": f"Invalid command: {item}"}), 400
+        commands.append((device_id, state))
+    if not commands:
+        return jsonify({"error": "No commands"}), 400
+
+    for topic, payload in registry.batch_payloads(commands).items():
+        mqtt_client.publish(topic, payload)
+    add_system_log(f"Web UI: Gửi {len(commands)} lệnh thiết bị trong một lần", "info", "DEVICE_WEB")
+
+    return jsonify({"status": "success", "commands": [{"id": d, "state": s} for d, s in commands]})
+
 @app.route('/api/play-remote-audio', methods=['POST'])
 def play_remote_audio():
     """Play audio from web interface"""
     if 'audio' not in request.files:
         return "No audio", 400
     
-    audio_blob = request.files['audio']
-    # Đổi sang thư mục /tmp/ để không bị lỗi phân quyền ghi file
-    raw_path = "/tmp/remote_raw.webm"
-    conv_path = "/tmp/remote_final.wav"
-    audio_blob.save(raw_path)
+    # Giải mã trong bộ nhớ, không cần file tạm / ffmpeg
+    audio_bytes = request.files['audio'].read()
     
     def play_task():
         try:
-            subprocess.run(
-                [
-                 'ffmpeg', '-y', '-i', raw_path,
-                 '-acodec', 'pcm_s16le',
-                 '-ar', '24000', '-ac', '1',
-                 conv_path
-                ],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-            
-            time.sleep(0.1)
-            _play_wav_blocking(conv_path)
-            
-            if os.path.exists(raw_path):
-                os.remove(raw_path)
-            if os.path.exists(conv_path):
-                os.remove(conv_path)
+            pcm = decode_audio(audio_bytes, OUTPUT_RATE)
+            if len(pcm):
+                audio_service.play(pcm, PRIORITY_REMOTE)
         except Exception as e:
             print(f"Lỗi play audio từ web: {e}")
             # Bỏ amp.off() đi vì amp không tồn tại trong file này
@@ -289,6 +316,15 @@ def play_remote_audio():
     threading.Thread(target=play_task, daemon=True).start()
     return jsonify({"status": "playing"})
 
+@app.route('/api/stop-audio', methods=['POST'])
+def stop_audio():
+    """Cancel queued speech and everything playing on the speaker"""
+    if not session.get('logged_in'):
+        return jsonify({"error": "Unauthorized"}), 401
+    speech.cancel_all_threadsafe()
+    audio_service.cancel_all()
+    return jsonify({"status": "stopped"})
+
 # @app.route('/api/play-remote-audio', methods=['POST'])
 # def play_remote_audio():
 #     """Play audio from web interface"""
@@ -0,0 +1,186 @@
+import asyncio
+import heapq
+import itertools
+import re
+import time
+
+import metrics
+
+# ==========================================
+# SPEECH SCHEDULER CONFIGURATION
+# ==========================================
+# Lower number = spoken first
+PRIORITY_URGENT = 0     # goodbye, safety / error messages
+PRIORITY_ACK = 1        # device acknowledgements, greeting
+PRIORITY_ANSWER = 2     # info answers, LLM replies
+PRIORITY_CHAT = 3       # web chat, background chatter
+
+
+def _normalize(text):
+    return re.sub(r"[\W_]+", " ", text.lower()).strip()
+
+
+class SpeechJob:
+    """One utterance waiting for the speaker"""
+
+    def __init__(self, text, priority, deadline, seq, speak=None):
+        self.text = text
+        self.key = _normalize(text) if speak is None else None   # streamed jobs are never deduplicated
+        self.speak = speak
+        self.priority = priority
+        self.created_at = time.monotonic()
+        self.deadline = None if deadline is None else self.created_at + deadline
+        self.seq = seq
+        self.future = asyncio.get_running_loop().create_future()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def expired(self, now=None):
+        return self.deadline is not None and (now or time.monotonic()) > self.deadline
+
+    def _resolve(self, spoken):
+        if not self.future.done():
+            self.future.set_result(spoken)
+
+
+class SpeechScheduler:
+    """Serializes every producer's speech on the event loop: priorities, deadlines, dedup, cancel"""
+
+    def __init__(self, speak_fn=None):
+        self.speak_fn = speak_fn
+        self.loop = None
+        self._heap = []
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._worker = None
+        self._current = None
+        self._current_task = None
+        self._cancel_requested = False
+        self._counters = {"spoken": 0, "dropped_stale": 0, "deduplicated": 0, "cancelled": 0, "failed": 0}
+
+    def start(self, speak_fn=None):
+        """Start the worker on the running loop (call from inside the loop)"""
+        if speak_fn is not None:
+            self.speak_fn = speak_fn
+        if self._worker is None:
+            self.loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+        return self
+
+    # ---------- producers ----------
+    def submit(self, text, priority=PRIORITY_ANSWER, deadline=None):
+        """Queue an utterance; deadline = seconds it may wait before it is dropped"""
+        self.start()
+        key = _normalize(text)
+        if not key:
+            job = SpeechJob(text, priority, deadline, next(self._seq))
+            job._resolve(False)
+            return job
+
+        for queued in self._heap:
+            if queued.key == key:
+                # collapse: keep one job with the most urgent priority / latest deadline
+                self._counters["deduplicated"] += 1
+                if priority < queued.priority:
+                    queued.priority = priority
+                    heapq.heapify(self._heap)
+                if queued.deadline is not None:
+                    queued.deadline = None if deadline is None else max(queued.deadline, time.monotonic() + deadline)
+                return queued
+
+        job = SpeechJob(text, priority, deadline, next(self._seq))
+        heapq.heappush(self._heap, job)
+        self._wakeup.set()
+        return job
+
+    async def say(self, text, priority=PRIORITY_ANSWER, deadline=None):
+        """Queue and wait until spoken; True if it was actually played"""
+        return await self.submit(text, priority, deadline).future
+
+    def submit_stream(self, speak, label, priority=PRIORITY_ANSWER):
+        """Queue an utterance whose text is still being produced; speak() is awaited when its turn comes"""
+        self.start()
+        job = SpeechJob(label, priority, None, next(self._seq), speak)
+        heapq.heappush(self._heap, job)
+        self._wakeup.set()
+        return job
+
+    async def say_stream(self, speak, label, priority=PRIORITY_ANSWER):
+        """submit_stream() and wait; True if it was actually played"""
+        return await self.submit_stream(speak, label, priority).future
+
+    def submit_threadsafe(self, text, priority=PRIORITY_CHAT, deadline=None):
+        """Queue from another thread (e.g. Flask); no-op until the loop has started"""
+        if self.loop is None:
+            return False
+        self.loop.call_soon_threadsafe(self.submit, text, priority, deadline)
+        return True
+
+    # ---------- cancellation ----------
+    def cancel_current(self):
+        if self._current_task and not self._current_task.done():
+            self._cancel_requested = True
+            self._current_task.cancel()
+            return True
+        return False
+
+    def cancel_all(self):
+        for job in self._heap:
+            job._resolve(False)
+        self._counters["cancelled"] += len(self._heap)
+        self._heap.clear()
+        self.cancel_current()
+
+    def cancel_all_threadsafe(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.cancel_all)
+
+    # ---------- worker ----------
+    async def _run(self):
+        while True:
+            while not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            job = heapq.heappop(self._heap)
+            now = time.monotonic()
+            if job.expired(now):
+                self._counters["dropped_stale"] += 1
+                job._resolve(False)
+                continue
+
+            metrics.record_latency("speech_wait", now - job.created_at)
+            self._current = job
+            self._cancel_requested = False
+            self._current_task = asyncio.create_task(job.speak() if job.speak else self.speak_fn(job.text))
+            try:
+                await self._current_task
+                self._counters["spoken"] += 1
+                job._resolve(True)
+            except asyncio.CancelledError:
+                if not self._cancel_requested:
+                    raise  # the worker itself is being cancelled
+                self._counters["cancelled"] += 1
+                job._resolve(False)
+            except Exception as e:
+                print(f"Speech job error: {e}")
+                self._counters["failed"] += 1
+                job._resolve(False)
+            finally:
+                self._current = None
+                self._current_task = None
+
+    def stats(self):
+        now = time.monotonic()
+        return dict(
+            self._counters,
+            queue_depth=len(self._heap),
+            oldest_wait_ms=round(max((now - j.created_at for j in self._heap), default=0) * 1000, 1),
+            speaking=self._current.text if self._current else None,
+        )
+
+
+speech = SpeechScheduler()
+metrics.register_source("speech", speech.stats)
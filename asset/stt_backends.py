@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+import time
+
+import speech_recognition as sr
+
+import globals
+import metrics
+from audio_codec import convert_pcm
+
+try:
+    from vosk import Model, KaldiRecognizer, SetLogLevel  # offline Kaldi recognizer
+except ImportError:
+    Model = None
+
+# ==========================================
+# STT BACKEND CONFIGURATION
+# ==========================================
+STT_MODES = ("auto", "vosk", "google")
+STT_BACKEND = os.getenv('STT_BACKEND', 'auto')      # one of STT_MODES
+STT_LANGUAGE = "vi-VN"
+VOSK_MODEL_DIR = os.getenv('VOSK_MODEL_DIR', os.path.join(globals.BASE_DIR, "models", "vosk-model-small-vn-0.4"))
+VOSK_RATE = 16000
+
+
+class STTBackend:
+    """One recognizer. transcribe() takes int16 mono PCM, returns text or None if nothing understood"""
+
+    name = "base"
+    offline = False
+
+    def available(self):
+        return True
+
+    def prepare(self):
+        """Load models etc. (blocking, called once at startup)"""
+
+    def transcribe(self, pcm, rate):
+        raise NotImplementedError
+
+    def open_stream(self, rate):
+        """Incremental session with feed()/finish(), or None if only whole utterances are supported"""
+        return None
+
+
+class GoogleSTTBackend(STTBackend):
+    """Google Web Speech API through speech_recognition (needs internet)"""
+
+    name = "google"
+
+    def __init__(self, language=STT_LANGUAGE):
+        self.language = language
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, pcm, rate):
+        audio = sr.AudioData(pcm.tobytes(), rate, 2)
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language)
+        except sr.UnknownValueError:
+            return None
+
+
+class VoskBackend(STTBackend):
+    """On-device Vietnamese recognizer (vosk + small vn model), model kept resident"""
+
+    name = "vosk"
+    offline = True
+
+    def __init__(self, model_dir=VOSK_MODEL_DIR):
+        self.model_dir = model_dir
+        self._model = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        return Model is not None and os.path.isdir(self.model_dir)
+
+    def prepare(self):
+        with self._lock:
+            if self._model is None:
+                t0 = time.monotonic()
+                SetLogLevel(-1)
+                self._model = Model(self.model_dir)
+                print(f">>> 🎙️ Vosk model loaded in {time.monotonic() - t0:.1f}s")
+        return self._model
+
+    def transcribe(self, pcm, rate):
+        model = self.prepare()
+        rec = KaldiRecognizer(model, VOSK_RATE)
+        rec.AcceptWaveform(convert_pcm(pcm, rate, VOSK_RATE).tobytes())
+        text = json.loads(rec.FinalResult()).get("text", "").strip()
+        return text or None
+
+    def open_stream(self, rate):
+        return VoskStream(KaldiRecognizer(self.prepare(), VOSK_RATE), rate)
+
+
+class VoskStream:
+    """One utterance fed frame batch by frame batch; feed() returns the partial hypothesis"""
+
+    def __init__(self, recognizer, rate):
+        self.recognizer = recognizer
+        self.rate = rate
+        self.segments = []     # text of segments Kaldi already endpointed inside the utterance
+        self.partial = ""
+        self.t0 = time.monotonic()
+
+    def _join(self, text):
+        return " ".join(self.segments + ([text] if text else []))
+
+    def feed(self, pcm):
+        """Partial text of the whole utterance so far (repeated while unchanged), None before any words"""
+        data = convert_pcm(pcm, self.rate, VOSK_RATE).tobytes()
+        if self.recognizer.AcceptWaveform(data):
+            # mid-utterance endpoint: keep the finished segment, the next one starts empty
+            text = json.loads(self.recognizer.Result()).get("text", "").strip()
+            if text:
+                self.segments.append(text)
+            text = ""
+        else:
+            text = json.loads(self.recognizer.PartialResult()).get("partial", "").strip()
+        self.partial = self._join(text) or self.partial
+        return self.partial or None
+
+    def finish(self):
+        text = json.loads(self.recognizer.FinalResult()).get("text", "").strip()
+        metrics.record_latency("stt_vosk_stream", time.monotonic() - self.t0)
+        return self._join(text) or self.partial or None
+
+
+class STTRouter:
+    """Runs the configured recognizer; falls back to the next one when a backend errors"""
+
+    def __init__(self, backends, preferred=STT_BACKEND):
+        self.backends = [b for b in backends if b.available()]
+        self.preferred = preferred
+        self.last_used = None
+        self.errors = {}
+
+    @property
+    def mode(self):
+        """SYSTEM_CONFIG['stt'] overrides the STT_BACKEND env default"""
+        return globals.SYSTEM_CONFIG.get("stt", self.preferred)
+
+    def prepare(self):
+        for backend in self.backends:
+            try:
+                backend.prepare()
+            except Exception as e:
+                print(f"❌ STT backend {backend.name} prepare failed: {e}")
+
+    def candidates(self):
+        """Selected backend first; 'auto' = offline first, online as fallback"""
+        mode = self.mode
+        if mode == "auto":
+            return sorted(self.backends, key=lambda b: not b.offline)
+        chosen = [b for b in self.backends if b.name == mode]
+        return chosen + [b for b in self.backends if b.name != mode]
+
+    def transcribe(self, pcm, rate):
+        """Text from the first backend that answers; None if speech was not understood"""
+        last_error = None
+        for backend in self.candidates():
+            t0 = time.monotonic()
+            try:
+                text = backend.transcribe(pcm, rate)
+            except Exception as e:
+                self.errors[backend.name] = self.errors.get(backend.name, 0) + 1
+                metrics.incr(f"stt_error_{backend.name}")
+                last_error = e
+                print(f"⚠️ STT {backend.name} failed ({type(e).__name__}), chuyển sang backend khác")
+                continue
+            metrics.record_latency(f"stt_{backend.name}", time.monotonic() - t0)
+            self.last_used = backend.name
+            return text
+
+        if last_error is not None:
+            raise last_error
+        return None
+
+    def open_stream(self, rate):
+        """Streaming session on the preferred backend (None = fall back to transcribe())"""
+        candidates = self.candidates()
+        if not candidates:
+            return None
+        try:
+            stream = candidates[0].open_stream(rate)
+        except Exception as e:
+            print(f"⚠️ STT stream {candidates[0].name} failed: {e}")
+            return None
+        if stream is not None:
+            self.last_used = candidates[0].name
+        return stream
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "backends": [b.name for b in self.backends],
+            "last_used": self.last_used,
+            "errors": dict(self.errors),
+        }
@@ -15,7 +15,9 @@ def load_system_config():
         "ai": True,
         "mic": True,
         "sound": True,
-        "tracking": False
+        "tracking": False,
+        "wake_word": True,
+        "llm_cache": True
     }
     if os.path.exists(globals.CONFIG_FILE):
         try:
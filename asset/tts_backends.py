@@ -0,0 +1,240 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import numpy as np
+import edge_tts
+
+import globals
+import metrics
+from audio_codec import decode_audio, convert_pcm, open_stream_decoder
+
+try:
+    from piper.voice import PiperVoice  # offline neural TTS (piper-tts)
+except ImportError:
+    PiperVoice = None
+
+# ==========================================
+# TTS BACKEND CONFIGURATION
+# ==========================================
+TTS_LATENCY_BUDGET = float(os.getenv('TTS_LATENCY_BUDGET', '2.0'))   # max seconds to first audio
+TTS_RETRY_AFTER = float(os.getenv('TTS_RETRY_AFTER', '60'))          # cooldown before retrying a slow backend
+TTS_EWMA_ALPHA = 0.3
+PIPER_MODEL = os.getenv('PIPER_MODEL', os.path.join(globals.BASE_DIR, "models", "vi_VN-vais1000-medium.onnx"))
+ESPEAK_BIN = shutil.which("espeak-ng") or shutil.which("espeak")
+
+
+class TTSBackend:
+    """One speech engine. stream_pcm() yields int16 mono PCM bytes at the requested rate"""
+
+    name = "base"
+    # voice / pitch / rate go into the TTS cache key
+    voice = ""
+    pitch = ""
+    rate = ""
+
+    def available(self):
+        return True
+
+    def prepare(self):
+        """Load models etc. (blocking, called once from an executor)"""
+
+    async def stream_pcm(self, text, out_rate):
+        raise NotImplementedError
+        yield b""
+
+
+class EdgeTTSBackend(TTSBackend):
+    """Microsoft Edge online voices (needs internet)"""
+
+    name = "edge"
+
+    def __init__(self, voice, pitch, rate):
+        self.voice = voice
+        self.pitch = pitch
+        self.rate = rate
+
+    async def stream_pcm(self, text, out_rate):
+        loop = asyncio.get_running_loop()
+        out = asyncio.Queue()
+        decoder = open_stream_decoder(out_rate, lambda b: loop.call_soon_threadsafe(out.put_nowait, b))
+
+        async def pump():
+            try:
+                communicate = edge_tts.Communicate(text, self.voice, pitch=self.pitch, rate=self.rate)
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        await loop.run_in_executor(None, decoder.feed, chunk["data"])
+                await loop.run_in_executor(None, decoder.close)
+                out.put_nowait(None)
+            except Exception as e:
+                out.put_nowait(e)
+
+        task = asyncio.create_task(pump())
+        try:
+            while True:
+                item = await out.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if not task.done():
+                task.cancel()
+                decoder.abort()
+
+
+class PiperBackend(TTSBackend):
+    """Offline Vietnamese neural voice (piper-tts + onnx model), kept resident"""
+
+    name = "piper"
+
+    def __init__(self, model_path=PIPER_MODEL):
+        self.model_path = model_path
+        self.voice = "piper:" + os.path.basename(model_path)
+        self._voice = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        return PiperVoice is not None and os.path.exists(self.model_path)
+
+    def prepare(self):
+        with self._lock:
+            if self._voice is None:
+                t0 = time.monotonic()
+                self._voice = PiperVoice.load(self.model_path)
+                print(f">>> 🗣️ Piper voice loaded in {time.monotonic() - t0:.1f}s")
+        return self._voice
+
+    def _synthesize_chunks(self, text):
+        """Blocking: list of (int16 array, sample_rate), one per sentence"""
+        voice = self.prepare()
+        if hasattr(voice, "synthesize_stream_raw"):
+            rate = voice.config.sample_rate
+            return [(np.frombuffer(raw, dtype=np.int16), rate) for raw in voice.synthesize_stream_raw(text)]
+        return [(np.frombuffer(c.audio_int16_bytes, dtype=np.int16), c.sample_rate) for c in voice.synthesize(text)]
+
+    async def stream_pcm(self, text, out_rate):
+        loop = asyncio.get_running_loop()
+        chunks = await loop.run_in_executor(None, self._synthesize_chunks, text)
+        for pcm, rate in chunks:
+            yield convert_pcm(pcm, rate, out_rate).tobytes()
+
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng Vietnamese voice: robotic, but always available offline"""
+
+    name = "espeak"
+    voice = "espeak:vi"
+
+    def available(self):
+        return ESPEAK_BIN is not None
+
+    def _synthesize(self, text, out_rate):
+        res = subprocess.run(
+            [ESPEAK_BIN, "-v", "vi", "-s", "165", "--stdout", text],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        return decode_audio(res.stdout, out_rate)
+
+    async def stream_pcm(self, text, out_rate):
+        loop = asyncio.get_running_loop()
+        pcm = await loop.run_in_executor(None, self._synthesize, text, out_rate)
+        if len(pcm):
+            yield pcm.tobytes()
+
+
+class TTSRouter:
+    """Picks a backend by measured time-to-first-audio and fails over when one is over budget"""
+
+    def __init__(self, backends, budget=TTS_LATENCY_BUDGET, retry_after=TTS_RETRY_AFTER):
+        self.backends = [b for b in backends if b.available()]
+        self.budget = budget
+        self.retry_after = retry_after
+        self.ewma = {}
+        self.cooldown_until = {}
+        self.last_used = None
+
+    def prepare(self):
+        for backend in self.backends:
+            try:
+                backend.prepare()
+            except Exception as e:
+                print(f"❌ TTS backend {backend.name} prepare failed: {e}")
+
+    def candidates(self):
+        """Healthy backends in configured order, then the cooling-down ones as a last resort"""
+        now = time.monotonic()
+        healthy, slow = [], []
+        for backend in self.backends:
+            over_budget = self.ewma.get(backend.name, 0) > self.budget
+            cooling = self.cooldown_until.get(backend.name, 0) > now
+            (slow if over_budget and cooling else healthy).append(backend)
+        return healthy + slow
+
+    def _observe(self, backend, latency):
+        prev = self.ewma.get(backend.name)
+        self.ewma[backend.name] = latency if prev is None else (1 - TTS_EWMA_ALPHA) * prev + TTS_EWMA_ALPHA * latency
+        metrics.record_latency(f"tts_first_chunk_{backend.name}", latency)
+        if latency > self.budget:
+            self.cooldown_until[backend.name] = time.monotonic() + self.retry_after
+
+    def _penalize(self, backend):
+        self.ewma[backend.name] = max(self.ewma.get(backend.name, 0), self.budget * 2)
+        self.cooldown_until[backend.name] = time.monotonic() + self.retry_after
+        metrics.incr(f"tts_failover_{backend.name}")
+
+    async def stream(self, text, out_rate):
+        """Yield (backend, pcm_bytes); only the last candidate may exceed the budget"""
+        candidates = self.candidates()
+        last_error = None
+        for i, backend in enumerate(candidates):
+            is_last = i == len(candidates) - 1
+            gen = backend.stream_pcm(text, out_rate)
+            t0 = time.monotonic()
+            try:
+                first = await asyncio.wait_for(gen.__anext__(), None if is_last else self.budget)
+            except StopAsyncIteration:
+                first = None
+            except (asyncio.TimeoutError, Exception) as e:
+                await gen.aclose()
+                self._penalize(backend)
+                last_error = e
+                print(f"⚠️ TTS {backend.name} failed ({type(e).__name__}), chuyển sang backend khác")
+                continue
+
+            self._observe(backend, time.monotonic() - t0)
+            self.last_used = backend.name
+            if first is not None:
+                yield backend, first
+            async for chunk in gen:
+                yield backend, chunk
+            return
+
+        raise RuntimeError(f"No TTS backend available: {last_error}")
+
+    async def synthesize(self, text, out_rate):
+        """Whole utterance as (backend, int16 array)"""
+        backend, parts = None, []
+        async for backend, chunk in self.stream(text, out_rate):
+            parts.append(chunk)
+        data = b"".join(parts)
+        return backend, np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16)
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "last_used": self.last_used,
+            "budget_ms": round(self.budget * 1000),
+            "backends": {
+                b.name: {
+                    "ewma_ms": round(self.ewma[b.name] * 1000, 1) if b.name in self.ewma else None,
+                    "cooldown_s": round(max(0.0, self.cooldown_until.get(b.name, 0) - now), 1),
+                }
+                for b in self.backends
+            },
+        }
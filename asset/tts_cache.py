@@ -0,0 +1,127 @@
+import hashlib
+import itertools
+import os
+import threading
+from collections import OrderedDict
+
+import globals
+
+# ==========================================
+# TTS CACHE CONFIGURATION
+# ==========================================
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', os.path.join(globals.BASE_DIR, "tts_cache"))
+TTS_CACHE_MAX_MB = float(os.getenv('TTS_CACHE_MAX_MB', '64'))
+
+
+class TTSCache:
+    """On-disk cache of playback-ready audio, keyed by text + voice settings, LRU evicted"""
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, max_bytes=int(TTS_CACHE_MAX_MB * 1024 * 1024), ext=".wav"):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ext = ext
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size, oldest first
+        self._total = 0
+        self._tmp_seq = itertools.count()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(text, voice, pitch, rate, fmt):
+        """Content address for one utterance rendered with one voice setup"""
+        raw = "\x1f".join([text, voice, pitch, rate, fmt])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key + self.ext)
+
+    def tmp_path_for(self, key):
+        """Scratch path inside the cache dir so put() can publish it atomically"""
+        return os.path.join(self.cache_dir, f".{key}.{os.getpid()}.{next(self._tmp_seq)}.tmp{self.ext}")
+
+    def _load_index(self):
+        """Rebuild LRU order from file mtimes (touched on every hit)"""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith("."):
+                # leftover scratch file from a crash
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(self.ext):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            found.append((st.st_mtime, name[:-len(self.ext)], st.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total += size
+        self._evict()
+
+    def contains(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key):
+        """Return cached file path or None, marking the entry as recently used"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            path = self.path_for(key)
+            if not os.path.exists(path):
+                self._total -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key, src_path):
+        """Move a finished file into the cache and return its final path"""
+        dst = self.path_for(key)
+        size = os.path.getsize(src_path)
+        os.replace(src_path, dst)
+        with self._lock:
+            if key in self._entries:
+                self._total -= self._entries.pop(key)
+            self._entries[key] = size
+            self._total += size
+            self._evict()
+        return dst
+
+    def _evict(self):
+        # always keep the newest entry, even if it alone exceeds the budget
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,153 @@
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+import metrics
+
+# ==========================================
+# VOICE ACTIVITY DETECTION CONFIGURATION
+# ==========================================
+VAD_HANGOVER_MS = int(os.getenv('VAD_HANGOVER_MS', '450'))   # trailing non-speech that ends an utterance
+VAD_ONSET_FRAMES = int(os.getenv('VAD_ONSET_FRAMES', '3'))   # consecutive speech frames to start
+ENERGY_FACTOR = float(os.getenv('VAD_ENERGY_FACTOR', '3.0'))  # speech RMS must exceed noise floor * factor
+MIN_SPEECH_RMS = 100.0
+BAND_LOW_HZ = 150
+BAND_HIGH_HZ = 4000
+BAND_RATIO_MIN = 0.40        # share of energy in the speech band for voiced frames
+FLATNESS_MAX = 0.5           # spectral flatness: ~1 for white noise, low for voiced speech
+ZCR_FRICATIVE = 0.25         # high zero-crossing + energy = unvoiced consonant (s, x, ch)
+HISTORY = 50                 # per-utterance records kept for threshold tuning
+
+
+def frame_features(frames, rate):
+    """Energy, zero-crossing rate, speech-band ratio and spectral flatness for (n, L) int16 frames"""
+    x = frames.astype(np.float32)
+    x -= x.mean(axis=1, keepdims=True)   # MEMS mics carry a DC offset
+    rms = np.sqrt(np.mean(x ** 2, axis=1))
+
+    signs = np.signbit(x)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+    window = np.hanning(x.shape[1]).astype(np.float32)
+    power = np.abs(np.fft.rfft(x * window, axis=1)) ** 2 + 1e-10
+    freqs = np.fft.rfftfreq(x.shape[1], 1.0 / rate)
+    band = (freqs >= BAND_LOW_HZ) & (freqs <= BAND_HIGH_HZ)
+    total = power.sum(axis=1)
+    band_ratio = power[:, band].sum(axis=1) / total
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+    return {"rms": rms, "zcr": zcr, "band_ratio": band_ratio, "flatness": flatness}
+
+
+def classify(features, noise_floor):
+    """Boolean speech flag per frame"""
+    threshold = max(noise_floor * ENERGY_FACTOR, MIN_SPEECH_RMS)
+    rms = features["rms"]
+    loud = rms > threshold
+    voiced = (features["band_ratio"] >= BAND_RATIO_MIN) & (features["flatness"] <= FLATNESS_MAX)
+    fricative = (features["zcr"] >= ZCR_FRICATIVE) & (rms > threshold * 1.5)
+    return loud & (voiced | fricative)
+
+
+class Endpointer:
+    """Frame-level start / end-of-utterance decisions with a configurable hangover"""
+
+    def __init__(self, frame_ms, hangover_ms=VAD_HANGOVER_MS, onset_frames=VAD_ONSET_FRAMES,
+                 max_frames=None, preroll_frames=0, min_start=0):
+        self.frame_ms = frame_ms
+        self.hangover_frames = max(1, int(hangover_ms / frame_ms))
+        self.onset_frames = onset_frames
+        self.max_frames = max_frames
+        self.preroll_frames = preroll_frames
+        self.min_start = min_start
+        self.start = None
+        self.end = None
+        self.last_speech_ts = None
+        self.speech_frames = 0
+        self._onset_run = 0
+        self._last_speech = None
+        self._feature_sums = {"speech": np.zeros(4), "other": np.zeros(4)}
+        self._feature_counts = {"speech": 0, "other": 0}
+
+    @property
+    def started(self):
+        return self.start is not None
+
+    def _accumulate(self, flags, features):
+        stacked = np.stack([features["rms"], features["zcr"], features["band_ratio"], features["flatness"]], axis=1)
+        for name, mask in (("speech", flags), ("other", ~flags)):
+            if mask.any():
+                self._feature_sums[name] += stacked[mask].sum(axis=0)
+                self._feature_counts[name] += int(mask.sum())
+
+    def feed(self, flags, first_index, timestamps, features=None):
+        """Consume a batch of flags for frames first_index.. ; True once the utterance has ended"""
+        for i, is_speech in enumerate(flags):
+            index = first_index + i
+            if self.start is None:
+                self._onset_run = self._onset_run + 1 if is_speech else 0
+                if self._onset_run >= self.onset_frames:
+                    self.start = max(self.min_start, index + 1 - self._onset_run - self.preroll_frames)
+                    self._last_speech = index
+                    self.last_speech_ts = float(timestamps[i])
+                    self.speech_frames = self._onset_run
+                continue
+
+            if is_speech:
+                self._last_speech = index
+                self.last_speech_ts = float(timestamps[i])
+                self.speech_frames += 1
+
+            too_long = self.max_frames is not None and index + 1 - self.start >= self.max_frames
+            if index - self._last_speech >= self.hangover_frames or too_long:
+                # keep a short tail after the last speech frame
+                self.end = min(index + 1, self._last_speech + 1 + self.preroll_frames)
+                if features is not None:
+                    self._accumulate(np.asarray(flags[:i + 1]), {k: v[:i + 1] for k, v in features.items()})
+                return True
+
+        if features is not None and self.start is not None:
+            self._accumulate(np.asarray(flags), features)
+        return False
+
+    def summary(self, noise_floor):
+        """Per-utterance record for threshold tuning"""
+        means = {}
+        for name in ("speech", "other"):
+            n = self._feature_counts[name]
+            values = self._feature_sums[name] / n if n else np.zeros(4)
+            means[name] = dict(zip(("rms", "zcr", "band_ratio", "flatness"), np.round(values, 3).tolist()))
+        return {
+            "frames": (self.end or 0) - (self.start or 0),
+            "speech_frames": self.speech_frames,
+            "noise_floor": round(float(noise_floor), 1),
+            "means": means,
+        }
+
+
+recent_utterances = deque(maxlen=HISTORY)
+
+
+def report_endpoint(endpointer, noise_floor):
+    """Endpoint latency = decision time - capture time of the last speech frame"""
+    latency = time.monotonic() - endpointer.last_speech_ts if endpointer.last_speech_ts else None
+    record = endpointer.summary(noise_floor)
+    record["endpoint_latency_ms"] = None if latency is None else round(latency * 1000, 1)
+    recent_utterances.append(record)
+    if latency is not None:
+        metrics.record_latency("vad_endpoint", latency)
+    return record
+
+
+def stats():
+    return {
+        "hangover_ms": VAD_HANGOVER_MS,
+        "onset_frames": VAD_ONSET_FRAMES,
+        "energy_factor": ENERGY_FACTOR,
+        "recent_utterances": list(recent_utterances)[-10:],
+    }
+
+
+metrics.register_source("vad", stats)
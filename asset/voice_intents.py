@@ -0,0 +1,120 @@
+import asyncio
+
+import globals
+import metrics
+from system_logs import add_system_log
+from ai_module import detect_info_request, answer_info_request, analyze_command_similarity, parse_device_commands
+from ai_module import devices_ack, speak_pipelined, get_news, llm, memory, llm_cache, LOCAL_MODEL, SYS_INSTRUCT_BASE, GOODBYE_TEXT
+from earcons import earcon_bank
+from early_intent import EarlyIntent
+from intent_router import IntentRouter, STOP
+from intent_classifier import intent_responder
+from uart_handle import robot
+from speech_scheduler import speech, PRIORITY_URGENT, PRIORITY_ACK, PRIORITY_ANSWER
+from mqtt_handler import mqtt_client
+from device_registry import registry
+from news_poller import detect_news_request
+
+# ==========================================
+# VOICE INTENTS CONFIGURATION
+# ==========================================
+ACK_DEADLINE = 5      # seconds a device ack may wait in the speech queue
+INFO_DEADLINE = 10
+
+
+def publish_devices(commands):
+    """Send device commands over MQTT, batched into one message per topic; True on success"""
+    try:
+        # MQTT publish (paho is thread-safe for publish)
+        for topic, payload in registry.batch_payloads(commands).items():
+            mqtt_client.publish(topic, payload)
+        summary = ", ".join(f"{device_id} -> {state.upper()}" for device_id, state in commands)
+        add_system_log(f"Gửi lệnh MQTT: Thiết bị {summary}", "info", "MQTT_CMD")
+        earcon_bank.play("accepted")
+        return True
+    except Exception as e:
+        print(f"MQTT publish error: {e}")
+        earcon_bank.play("error")
+        return False
+
+
+def publish_device(device_id, cmd_state):
+    return publish_devices([(device_id, cmd_state)])
+
+
+# device commands fire from partial transcripts, the final transcript confirms or undoes them
+early_intent = EarlyIntent(analyze_command_similarity, publish_device)
+metrics.register_source("early_intent", early_intent.stats)
+
+
+# ==========================================
+# INTENT STAGES (cheapest first, first match wins)
+# ==========================================
+intent_router = IntentRouter()
+metrics.register_source("intents", intent_router.stats)
+
+@intent_router.stage("goodbye", lambda text: "tạm biệt" in text.lower(), cost=0)
+async def handle_goodbye(text, _):
+    await speech.say(GOODBYE_TEXT, PRIORITY_URGENT)
+    return STOP
+
+@intent_router.stage("devices", parse_device_commands, cost=1)
+async def handle_devices(text, commands):
+    pending = early_intent.reconcile(commands)
+    if pending:
+        publish_devices(pending)
+    await speech.say(devices_ack(commands), PRIORITY_ACK, deadline=ACK_DEADLINE)
+
+@intent_router.stage("info", detect_info_request, cost=2)
+async def handle_info(text, request):
+    # weather lookups await the shared async HTTP pool, speech keeps playing
+    info = await answer_info_request(*request)
+    if info:
+        await speech.say(info, PRIORITY_ANSWER, deadline=INFO_DEADLINE)
+
+@intent_router.stage("news", detect_news_request, cost=2)
+async def handle_news(text, category):
+    # answered from the poller's in-memory index, no network at ask time
+    await speech.say(get_news(category), PRIORITY_ANSWER, deadline=INFO_DEADLINE)
+
+@intent_router.stage("canned", intent_responder.classify, cost=3)
+async def handle_canned(text, prediction):
+    # common intents answered without the LLM
+    label, confidence = prediction
+    print(f">>> 🧠 Intent {label} ({confidence:.2f})")
+    reply, action = intent_responder.response(label)
+    if action:
+        robot.send(action["cmd"], action["speed"], action["duration"], force=True)
+    if reply:
+        await speech.say(reply, PRIORITY_ANSWER, deadline=INFO_DEADLINE)
+
+@intent_router.stage("llm", lambda text: globals.SYSTEM_CONFIG.get("ai", True), cost=100)
+async def handle_llm(user_input, _):
+    # cached answers were generated without context: only valid at the start of a conversation
+    use_cache = globals.SYSTEM_CONFIG.get("llm_cache", True) and memory.fresh()
+    cached = llm_cache.get(LOCAL_MODEL, SYS_INSTRUCT_BASE, user_input) if use_cache else None
+    if cached is not None:
+        print(">>> 💾 LLM cache hit")
+        await speech.say(cached, PRIORITY_ANSWER)
+        memory.add_turn(user_input, cached)
+        return
+
+    # AI conversation: sentences are spoken while ollama is still generating
+    earcon_bank.play("thinking")
+    reply = llm.start(memory.messages(user_input))
+    spoken = await speech.say_stream(
+        lambda: speak_pipelined(reply.sentences(), label="llm", t0=reply.t0), "<llm>", PRIORITY_ANSWER
+    )
+    if not spoken:
+        # barge-in / shutdown: stop generating what will never be heard
+        reply.cancel()
+    else:
+        await reply.wait()
+    if reply.error:
+        earcon_bank.play("error")
+        await asyncio.sleep(0.5)
+    elif spoken and reply.text:
+        # a reply cut off by barge-in was never heard: it must not become conversation context
+        memory.add_turn(user_input, reply.text)
+        if use_cache:
+            llm_cache.put(LOCAL_MODEL, SYS_INSTRUCT_BASE, user_input, reply.text)
@@ -0,0 +1,195 @@
+import glob
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+import globals
+import metrics
+import vad
+from audio_codec import read_wav_pcm, convert_pcm
+
+# ==========================================
+# WAKE WORD CONFIGURATION
+# ==========================================
+WAKE_WORD = "Hanah"
+WAKE_DIR = os.path.join(globals.BASE_DIR, "wakeword")          # enrolled hanah_*.wav templates
+WAKE_THRESHOLD = float(os.getenv('WAKE_THRESHOLD', '0.40'))     # mean frame distance to accept
+WAKE_MAX_SECONDS = 1.5          # VAD segment length checked for the wake word
+WAKE_MIN_SECONDS = 0.25         # shorter segments are clicks / bumps
+WAKE_FOLLOWUP_SECONDS = float(os.getenv('WAKE_FOLLOWUP_SECONDS', '8'))  # no wake word needed right after a reply
+SAMPLE_RATE = 16000
+WIN_LEN = 400                   # 25 ms analysis window
+HOP_LEN = 160                   # 10 ms hop
+N_FFT = 512
+N_MELS = 26
+N_MFCC = 13
+HISTORY = 50
+
+
+def _mel_filterbank(rate=SAMPLE_RATE, n_fft=N_FFT, n_mels=N_MELS):
+    hz_to_mel = lambda f: 2595.0 * np.log10(1.0 + f / 700.0)
+    mel_to_hz = lambda m: 700.0 * (10 ** (m / 2595.0) - 1.0)
+    mels = np.linspace(hz_to_mel(0), hz_to_mel(rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mels) / rate).astype(int)
+    fb = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            fb[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            fb[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return fb
+
+
+def _dct_matrix(n_in=N_MELS, n_out=N_MFCC):
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)).astype(np.float32)
+
+
+MEL_FB = _mel_filterbank()
+DCT = _dct_matrix()
+WINDOW = np.hamming(WIN_LEN).astype(np.float32)
+
+
+def mfcc(pcm):
+    """(n_frames, N_MFCC) mean/variance-normalized MFCCs for 16 kHz int16 PCM"""
+    x = pcm.astype(np.float32)
+    if len(x) < WIN_LEN:
+        return np.zeros((0, N_MFCC), dtype=np.float32)
+    x = np.append(x[0], x[1:] - 0.97 * x[:-1])   # pre-emphasis
+    n_frames = 1 + (len(x) - WIN_LEN) // HOP_LEN
+    idx = np.arange(WIN_LEN)[None, :] + HOP_LEN * np.arange(n_frames)[:, None]
+    power = np.abs(np.fft.rfft(x[idx] * WINDOW, N_FFT, axis=1)) ** 2
+    feats = np.log(power @ MEL_FB.T + 1e-6) @ DCT.T
+    return (feats - feats.mean(axis=0)) / (feats.std(axis=0) + 1e-6)
+
+
+def dtw_match(template, segment):
+    """Subsequence DTW: whole template against any stretch of segment -> (mean cost per template frame, end frame).
+
+    Each step advances the template by one frame and the segment by 0-2 frames,
+    so every row is computed in one vectorized pass.
+    """
+    if not len(template) or not len(segment):
+        return np.inf, 0
+    t = template / (np.linalg.norm(template, axis=1, keepdims=True) + 1e-6)
+    s = segment / (np.linalg.norm(segment, axis=1, keepdims=True) + 1e-6)
+    cost = 1.0 - t @ s.T                       # cosine distance, (len(template), len(segment))
+
+    acc = cost[0].copy()                       # free start anywhere in the segment
+    for i in range(1, len(cost)):
+        prev = acc
+        best = prev.copy()
+        best[1:] = np.minimum(best[1:], prev[:-1])
+        best[2:] = np.minimum(best[2:], prev[:-2])
+        acc = cost[i] + best
+    end = int(acc.argmin())                    # free end: segment frame where the template match ends
+    return float(acc[end] / len(cost)), end
+
+
+def dtw_distance(template, segment):
+    return dtw_match(template, segment)[0]
+
+
+def trim_silence(pcm, rate=SAMPLE_RATE):
+    """Cut an enrolled recording down to its speech frames"""
+    frame_len = rate // 50
+    frames = pcm[:len(pcm) // frame_len * frame_len].reshape(-1, frame_len)
+    if not len(frames):
+        return pcm
+    features = vad.frame_features(frames, rate)
+    speech = np.nonzero(vad.classify(features, np.percentile(features["rms"], 20)))[0]
+    if not len(speech):
+        return pcm
+    return pcm[speech[0] * frame_len:(speech[-1] + 1) * frame_len]
+
+
+class WakeWordSpotter:
+    """'Hanah' keyword spotter: VAD segments matched against enrolled MFCC templates"""
+
+    def __init__(self, template_dir=WAKE_DIR, threshold=WAKE_THRESHOLD):
+        self.template_dir = template_dir
+        self.threshold = threshold
+        self.templates = []
+        self.awake_until = 0.0
+        self.recent = deque(maxlen=HISTORY)
+        self._counters = {"segments": 0, "hits": 0, "rejects": 0}
+        self.load_templates()
+
+    def load_templates(self):
+        paths = sorted(glob.glob(os.path.join(self.template_dir, "hanah_*.wav")))
+        self.templates = [mfcc(trim_silence(read_wav_pcm(p, SAMPLE_RATE))) for p in paths]
+        self.templates = [t for t in self.templates if len(t)]
+        if self.templates:
+            print(f">>> 👂 Wake word '{WAKE_WORD}': {len(self.templates)} templates")
+        return len(self.templates)
+
+    @property
+    def enabled(self):
+        return bool(self.templates) and globals.SYSTEM_CONFIG.get("wake_word", True)
+
+    def is_awake(self):
+        """Inside the follow-up window after the last exchange"""
+        return time.monotonic() < self.awake_until
+
+    def keep_awake(self, seconds=WAKE_FOLLOWUP_SECONDS):
+        self.awake_until = time.monotonic() + seconds
+
+    def match(self, pcm, rate=SAMPLE_RATE):
+        """(best template distance, sample in pcm where the wake word ends)"""
+        if rate != SAMPLE_RATE:
+            pcm = convert_pcm(pcm, rate, SAMPLE_RATE)
+        feats = mfcc(pcm)
+        distance, end = min((dtw_match(t, feats) for t in self.templates), default=(np.inf, 0))
+        # centre of the last matched analysis window, back at the caller's rate
+        return distance, int((end * HOP_LEN + WIN_LEN // 2) * rate / SAMPLE_RATE)
+
+    def score(self, pcm, rate=SAMPLE_RATE):
+        """Best (lowest) template distance for a segment"""
+        return self.match(pcm, rate)[0]
+
+    def detect(self, pcm, rate=SAMPLE_RATE):
+        """Sample where the wake word ends if the segment starts with it, else None"""
+        self._counters["segments"] += 1
+        if len(pcm) < WAKE_MIN_SECONDS * rate:
+            self._counters["rejects"] += 1
+            return None
+        t0 = time.monotonic()
+        distance, end = self.match(pcm[:int(WAKE_MAX_SECONDS * rate)], rate)
+        metrics.record_latency("wake_match", time.monotonic() - t0)
+        hit = distance <= self.threshold
+        self._counters["hits" if hit else "rejects"] += 1
+        self.recent.append({"distance": round(distance, 3), "hit": hit, "seconds": round(len(pcm) / rate, 2)})
+        return end if hit else None
+
+    def wait(self, mic, timeout=5):
+        """Block until the wake word is heard on the mic.
+
+        Returns the ring cursor right after "Hanah" (None on timeout / no match), so a command
+        said in the same breath ("Hanah, bật đèn hai") is captured from there instead of being lost.
+        """
+        pcm = mic.get_utterance(timeout=timeout, phrase_time_limit=WAKE_MAX_SECONDS)
+        if pcm is None or not len(pcm):
+            return None
+        end = self.detect(pcm, mic.rate)
+        if end is None:
+            return None
+        start, stop = mic.last_span
+        return min(start + end // mic.frame_len, stop)
+
+    def stats(self):
+        return dict(
+            self._counters,
+            enabled=self.enabled,
+            templates=len(self.templates),
+            threshold=self.threshold,
+            awake=self.is_awake(),
+            recent=list(self.recent)[-10:],
+        )
+
+
+wake_word = WakeWordSpotter()
+metrics.register_source("wake_word", wake_word.stats)
@@ -0,0 +1,184 @@
+import asyncio
+import os
+import re
+import threading
+import time
+import unicodedata
+
+import globals
+import metrics
+from http_client import http, sleep_unless_stopped
+
+# ==========================================
+# WEATHER PROVIDER CONFIGURATION
+# ==========================================
+OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')
+OPENWEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
+DEFAULT_CITY = os.getenv('WEATHER_DEFAULT_CITY', 'Hanoi')
+WEATHER_TTL = 600               # fresh for 10 min
+WEATHER_STALE_MAX = 3 * 3600    # stale answers are still spoken for up to 3 h
+WEATHER_TIMEOUT = 2.0           # seconds a voice answer may wait on a cache miss
+REFRESH_INTERVAL = 120          # background loop period
+RECENT_CITIES = 5               # recently asked cities kept warm besides the default
+RECENT_WINDOW = 24 * 3600
+NOT_FOUND_TTL = 3600
+
+# spoken names -> OpenWeather query (keys are normalized)
+CITY_QUERIES = {
+    "hanoi": "Hanoi",
+    "hn": "Hanoi",
+    "thudo": "Hanoi",
+    "hochiminh": "Ho Chi Minh City",
+    "thanhphohochiminh": "Ho Chi Minh City",
+    "saigon": "Ho Chi Minh City",
+    "tphcm": "Ho Chi Minh City",
+    "danang": "Da Nang",
+    "haiphong": "Haiphong",
+    "hue": "Hue",
+    "cantho": "Can Tho",
+    "nhatrang": "Nha Trang",
+    "dalat": "Da Lat",
+}
+
+
+def _strip_accents(text):
+    text = text.replace("đ", "d").replace("Đ", "D")
+    return "".join(c for c in unicodedata.normalize("NFD", text) if unicodedata.category(c) != "Mn")
+
+
+def normalize_city(name):
+    """'Hà Nội' / 'hanoi' / 'Ha noi' -> 'hanoi'"""
+    return re.sub(r"[^a-z0-9]", "", _strip_accents(name.lower()))
+
+
+def city_query(name):
+    """(cache key, OpenWeather query) for a spoken city name"""
+    query = CITY_QUERIES.get(normalize_city(name), _strip_accents(name).strip().title())
+    # aliases of one city share a cache entry
+    return normalize_city(query), query
+
+
+class WeatherProvider:
+    """OpenWeather behind a normalized-city TTL cache with stale-while-revalidate and a refresh task"""
+
+    def __init__(self, api_key=OPENWEATHER_API_KEY, ttl=WEATHER_TTL, stale_max=WEATHER_STALE_MAX):
+        self.api_key = api_key
+        self.ttl = ttl
+        self.stale_max = stale_max
+        self._cache = {}          # key -> {"data": dict or None, "fetched_at": t}
+        self._asked = {}          # key -> (query, last asked)
+        self._refreshing = {}     # key -> in-flight fetch task
+        self._lock = threading.Lock()   # stats() is read from the web thread
+        self._task = None
+        self._counters = {"fresh": 0, "stale": 0, "miss": 0, "fetch_errors": 0}
+
+    @property
+    def enabled(self):
+        return bool(self.api_key)
+
+    # ---------- network ----------
+    async def _fetch(self, key, query):
+        params = {"q": query, "appid": self.api_key, "units": "metric", "lang": "vi"}
+        try:
+            res = (await http.get("weather", OPENWEATHER_URL, params=params)).json()
+        except Exception as e:
+            self._counters["fetch_errors"] += 1
+            print(f"Lỗi Weather API: {e!r}")
+            return False
+
+        if str(res.get("cod")) == "200":
+            data = {"temp": round(res['main']['temp']), "desc": res['weather'][0]['description']}
+        else:
+            data = None   # unknown city: cached too, so it is not re-queried every time
+        with self._lock:
+            self._cache[key] = {"data": data, "fetched_at": time.monotonic()}
+        return True
+
+    def _refresh_async(self, key, query):
+        """In-flight fetch for key, started if there is none (one fetch per city at a time)"""
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, query))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return task
+
+    # ---------- lookups ----------
+    def _entry_age(self, entry):
+        return time.monotonic() - entry["fetched_at"]
+
+    async def get(self, city, timeout=WEATHER_TIMEOUT):
+        """(status, data): status fresh/stale/miss/error; data None for unknown cities"""
+        key, query = city_query(city)
+        with self._lock:
+            self._asked[key] = (query, time.monotonic())
+            entry = self._cache.get(key)
+
+        if entry is not None:
+            age = self._entry_age(entry)
+            ttl = self.ttl if entry["data"] is not None else NOT_FOUND_TTL
+            if age < ttl:
+                self._counters["fresh"] += 1
+                return "fresh", entry["data"]
+            if age < self.stale_max:
+                # answer now, revalidate in the background
+                self._counters["stale"] += 1
+                self._refresh_async(key, query)
+                return "stale", entry["data"]
+
+        self._counters["miss"] += 1
+        task = self._refresh_async(key, query)
+        try:
+            # too slow for this answer: the fetch keeps running for the next question
+            ok = await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            ok = False
+        if not ok:
+            return "error", None
+        with self._lock:
+            return "miss", self._cache[key]["data"]
+
+    # ---------- background refresh ----------
+    def _known_missing(self, key):
+        entry = self._cache.get(key)
+        return entry is not None and entry["data"] is None
+
+    def _warm_keys(self):
+        """Default city + recently asked real cities; not-found names ("hôm nay thế nào") are never kept warm"""
+        now = time.monotonic()
+        with self._lock:
+            recent = sorted(
+                ((k, q, t) for k, (q, t) in self._asked.items()
+                 if now - t < RECENT_WINDOW and not self._known_missing(k)),
+                key=lambda item: item[2], reverse=True
+            )[:RECENT_CITIES]
+        keys = [city_query(DEFAULT_CITY)] + [(k, q) for k, q, _ in recent]
+        return list(dict(keys).items())
+
+    async def _run(self):
+        while not globals.STOP_EVENT.is_set():
+            stale = []
+            for key, query in self._warm_keys():
+                with self._lock:
+                    entry = self._cache.get(key)
+                # refresh a little before expiry so voice answers stay fresh
+                if entry is None or self._entry_age(entry) > self.ttl - REFRESH_INTERVAL:
+                    stale.append(self._refresh_async(key, query))
+            if stale:
+                await asyncio.gather(*stale, return_exceptions=True)
+            await sleep_unless_stopped(REFRESH_INTERVAL)
+
+    def start(self):
+        """Schedule the refresh task on the running event loop"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def stats(self):
+        with self._lock:
+            cached = {k: round(self._entry_age(e)) for k, e in self._cache.items()}
+        return dict(self._counters, enabled=self.enabled, cached_age_s=cached)
+
+
+weather = WeatherProvider()
+metrics.register_source("weather", weather.stats)
@@ -0,0 +1,80 @@
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(os.path.dirname(CURRENT_DIR), "asset")
+sys.path.append(ASSET_DIR)
+
+from audio_codec import decode_audio, av, DEFAULT_RATE
+
+# So sánh: ffmpeg subprocess + file tạm (cách cũ) vs giải mã trong tiến trình (audio_codec)
+ITERATIONS = 20
+DEFAULT_INPUT = os.path.join(CURRENT_DIR, "test_voice.wav")
+
+
+def ffmpeg_convert(data, rate):
+    """Old path: write temp file, spawn ffmpeg, read wav back"""
+    src = tempfile.NamedTemporaryFile(prefix="bench_raw_", delete=False)
+    src.write(data)
+    src.close()
+    dst = src.name + ".wav"
+    try:
+        subprocess.run(
+            [
+                "/usr/bin/ffmpeg", "-y",
+                "-i", src.name,
+                "-ac", "1",
+                "-ar", str(rate),
+                "-acodec", "pcm_s16le",
+                dst
+            ],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        with open(dst, 'rb') as f:
+            return f.read()
+    finally:
+        for f in (src.name, dst):
+            if os.path.exists(f):
+                os.remove(f)
+
+
+def bench(name, fn, data):
+    fn(data)  # warm-up
+    times = []
+    for _ in range(ITERATIONS):
+        t0 = time.perf_counter()
+        fn(data)
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    print(
+        f"{name:<12} mean {statistics.mean(times) * 1000:7.1f} ms | "
+        f"p50 {times[len(times) // 2] * 1000:7.1f} ms | "
+        f"p90 {times[int(len(times) * 0.9)] * 1000:7.1f} ms"
+    )
+
+
+def main():
+    paths = sys.argv[1:] or [DEFAULT_INPUT]
+    print(f"PyAV: {'yes' if av is not None else 'no (ffmpeg pipe fallback)'} | {ITERATIONS} runs")
+
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        print("=" * 60)
+        print(f"{os.path.basename(path)} ({len(data) / 1024:.0f} KB)")
+        bench("ffmpeg", lambda d: ffmpeg_convert(d, DEFAULT_RATE), data)
+        bench("in-process", lambda d: decode_audio(d, DEFAULT_RATE), data)
+
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print("=" * 60)
+    print(f"Peak RSS: python {self_rss:.1f} MB | largest ffmpeg child {child_rss:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+import resource
+import statistics
+import sys
+import time
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(os.path.dirname(CURRENT_DIR), "asset")
+sys.path.append(ASSET_DIR)
+
+from audio_codec import read_wav_pcm
+from stt_backends import VoskBackend, GoogleSTTBackend
+
+# So sánh độ trễ nhận dạng: Vosk (offline, trên Pi) vs Google (qua mạng)
+ITERATIONS = 5
+RATE = 16000
+DEFAULT_INPUT = os.path.join(CURRENT_DIR, "test_voice.wav")
+
+
+def bench(backend, pcm):
+    times, text = [], None
+    for _ in range(ITERATIONS):
+        t0 = time.perf_counter()
+        try:
+            text = backend.transcribe(pcm, RATE)
+        except Exception as e:
+            print(f"{backend.name:<8} ❌ {type(e).__name__}: {e}")
+            return
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    print(
+        f"{backend.name:<8} mean {statistics.mean(times) * 1000:7.1f} ms | "
+        f"p50 {times[len(times) // 2] * 1000:7.1f} ms | "
+        f"max {times[-1] * 1000:7.1f} ms | \"{text}\""
+    )
+
+
+def main():
+    paths = sys.argv[1:] or [DEFAULT_INPUT]
+    backends = [b for b in (VoskBackend(), GoogleSTTBackend()) if b.available()]
+    print(f"Backends: {', '.join(b.name for b in backends)} | {ITERATIONS} runs")
+
+    for backend in backends:
+        t0 = time.perf_counter()
+        backend.prepare()
+        print(f"{backend.name:<8} load {time.perf_counter() - t0:.2f} s")
+
+    for path in paths:
+        pcm = read_wav_pcm(path, RATE)
+        print("=" * 60)
+        print(f"{os.path.basename(path)} ({len(pcm) / RATE:.1f} s audio)")
+        for backend in backends:
+            bench(backend, pcm)
+
+    print("=" * 60)
+    print(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
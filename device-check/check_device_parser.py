@@ -0,0 +1,43 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(os.path.dirname(CURRENT_DIR), "asset")
+sys.path.append(ASSET_DIR)
+
+from device_registry import registry
+
+# Kiểm tra bộ phân tích lệnh thiết bị: câu nói thường không được biến thành lệnh bật/tắt relay
+CASES = [
+    # real commands
+    ("bật đèn 1", [("1", "on")]),
+    ("bật đèn số hai", [("2", "on")]),
+    ("tắt đèn ba đi", [("3", "off")]),
+    ("bật đèn 1 và đèn 2, tắt đèn 3", [("1", "on"), ("2", "on"), ("3", "off")]),
+    ("bật đèn 1 và 2", [("1", "on"), ("2", "on")]),
+    ("tắt đèn 1, bật 2", [("1", "off"), ("2", "on")]),
+    ("đèn phòng khách bật lên", [("1", "on")]),
+    ("mở đèn bếp giúp em", [("3", "on")]),
+    # ordinary speech: no command
+    ("mở một bài nhạc đi", []),
+    ("bật một bài hát", []),
+    ("em có thể mở lòng một chút không", []),
+    ("hôm nay thứ tư bật nhạc", []),
+    ("mở cửa sổ số hai", []),
+    ("hai bật lên", []),
+]
+
+
+def main():
+    failures = 0
+    for text, expected in CASES:
+        got = registry.parse(text)
+        ok = got == expected
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {text!r} -> {got}" + ("" if ok else f" (cần {expected})"))
+    print(f"{len(CASES) - failures}/{len(CASES)} OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(os.path.dirname(CURRENT_DIR), "asset")
+sys.path.append(ASSET_DIR)
+
+from http_client import http
+from news_poller import NewsPoller, detect_news_request
+
+# Kiểm tra bộ đọc RSS với máy chủ HTTP cục bộ: lần đầu tải về, lần sau phải nhận 304 (ETag / Last-Modified)
+SAMPLE_RSS = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Thời sự</title>
+<item><title>Tin cũ nhất</title><link>http://local/1</link><pubDate>Mon, 05 Oct 2026 08:00:00 +0700</pubDate></item>
+<item><title>Tin mới nhất</title><link>http://local/3</link><pubDate>Mon, 05 Oct 2026 10:00:00 +0700</pubDate></item>
+<item><title>Tin thứ hai</title><link>http://local/2</link><pubDate>Mon, 05 Oct 2026 09:00:00 +0700</pubDate></item>
+</channel></rss>""".encode("utf-8")
+ETAG = '"sample-v1"'
+LAST_MODIFIED = formatdate(time.time(), usegmt=True)
+hits = {"200": 0, "304": 0}
+# "tin" cũng là động từ "tin tưởng": chỉ cụm danh từ về tin tức mới được coi là hỏi tin
+DETECT_CASES = [
+    ("hôm nay có tin thời sự gì không", "thời sự"),
+    ("đọc tin công nghệ đi", "công nghệ"),
+    ("bản tin thế giới hôm nay", "thế giới"),
+    ("có tin gì mới về chứng khoán không", "kinh doanh"),
+    ("tin tức hôm nay", "thời sự"),
+    ("em có tin là khoa học giải thích được không", None),
+    ("em có tin vào thế giới bên kia không", None),
+    ("anh không tin đâu", None),
+]
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == ETAG or self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            hits["304"] += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        hits["200"] += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(SAMPLE_RSS)))
+        self.end_headers()
+        self.wfile.write(SAMPLE_RSS)
+
+    def log_message(self, *args):
+        pass
+
+
+async def poll_twice(poller):
+    first = await poller.poll_feed("thời sự")
+    second = await poller.poll_feed("thời sự")
+    await http.close()
+    return first, second
+
+
+def main():
+    server = HTTPServer(("127.0.0.1", 0), FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/rss"
+    poller = NewsPoller({"thời sự": url})
+
+    first, second = asyncio.run(poll_twice(poller))
+    server.shutdown()
+
+    print(f"Lần 1 cập nhật: {first} | Lần 2 cập nhật: {second} | server 200={hits['200']} 304={hits['304']}")
+    for h in poller.headlines("thời sự"):
+        print(f"  - {h.title} ({h.link})")
+
+    t0 = time.perf_counter()
+    category = detect_news_request("hôm nay có tin thời sự gì không")
+    headlines = poller.headlines(category)
+    print(f"Câu hỏi -> {category}: {len(headlines)} tin trong {(time.perf_counter() - t0) * 1000:.3f} ms")
+    print(poller.stats())
+
+    detect_ok = True
+    for text, expected in DETECT_CASES:
+        got = detect_news_request(text)
+        detect_ok &= got == expected
+        print(f"{'✅' if got == expected else '❌'} {text!r} -> {got}")
+
+    ok = first and not second and hits["304"] == 1 and headlines[0].title == "Tin mới nhất" and detect_ok
+    print("✅ OK" if ok else "❌ FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
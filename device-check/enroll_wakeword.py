@@ -0,0 +1,55 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(os.path.dirname(CURRENT_DIR), "asset")
+sys.path.append(ASSET_DIR)
+
+from audio_codec import pcm_to_wav_bytes
+from mic_capture import MicCapture
+import wake_word as ww
+
+# Ghi mẫu từ đánh thức "Hanah" vào asset/wakeword/ và gợi ý ngưỡng WAKE_THRESHOLD
+SAMPLES = 5
+MIC_ID = 0
+
+
+def record_samples(n):
+    mic = MicCapture(MIC_ID, rate=ww.SAMPLE_RATE).start()
+    os.makedirs(ww.WAKE_DIR, exist_ok=True)
+    saved = 0
+    while saved < n:
+        input(f"[{saved + 1}/{n}] Nhấn Enter rồi nói 'Hanah'...")
+        pcm = mic.get_utterance(timeout=5, phrase_time_limit=ww.WAKE_MAX_SECONDS)
+        if pcm is None or not len(pcm):
+            print("❌ Không nghe thấy gì, thử lại.")
+            continue
+        path = os.path.join(ww.WAKE_DIR, f"hanah_{saved + 1:02d}.wav")
+        with open(path, 'wb') as f:
+            f.write(pcm_to_wav_bytes(pcm, mic.rate))
+        print(f"✅ Đã lưu {path} ({len(pcm) / mic.rate:.2f} s)")
+        saved += 1
+    mic.stop()
+
+
+def suggest_threshold():
+    """Leave-one-out: each template scored against the others"""
+    spotter = ww.WakeWordSpotter()
+    templates = spotter.templates
+    if len(templates) < 2:
+        print("Cần ít nhất 2 mẫu để gợi ý ngưỡng.")
+        return
+    worst = 0.0
+    for i, t in enumerate(templates):
+        others = templates[:i] + templates[i + 1:]
+        best = min(ww.dtw_distance(o, t) for o in others)
+        worst = max(worst, best)
+        print(f"Mẫu {i + 1}: khoảng cách gần nhất {best:.3f}")
+    print("=" * 40)
+    print(f"Gợi ý: WAKE_THRESHOLD={worst * 1.2:.2f} (hiện tại {ww.WAKE_THRESHOLD})")
+
+
+if __name__ == "__main__":
+    if "--check" not in sys.argv:
+        record_samples(SAMPLES)
+    suggest_threshold()
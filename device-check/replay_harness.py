@@ -0,0 +1,264 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(os.path.dirname(CURRENT_DIR), "asset")
+sys.path.append(ASSET_DIR)
+
+import vad
+from audio_codec import read_wav_pcm
+from mic_capture import MicCapture, MIC_RATE, FRAME_MS
+from stt_backends import STTBackend, STTRouter, VoskBackend, GoogleSTTBackend
+from tts_backends import TTSBackend, TTSRouter, PiperBackend, EspeakBackend
+from ai_module import parse_device_commands, TTS_OUTPUT_RATE
+from speech_scheduler import speech
+from uart_handle import robot
+import voice_intents
+from voice_intents import intent_router, early_intent
+
+# Phát lại các file WAV qua đúng đường capture -> VAD -> STT -> intent -> TTS, đo độ trễ từng bước
+DEFAULT_CORPUS = CURRENT_DIR
+DEFAULT_OUTPUT = os.path.join(CURRENT_DIR, "replay_results.json")
+LEAD_SECONDS = 1.0      # silence before the clip so the noise floor settles
+TAIL_SECONDS = 1.5      # silence after the clip so the VAD can endpoint
+AI_PLACEHOLDER = "Đây là câu trả lời mẫu."
+STAGES = ["vad_endpoint", "stt", "intent", "tts_first_audio", "speech_end_to_audio"]
+
+
+class WavSource:
+    """Mic stand-in: a WAV clip padded with silence, delivered frame by frame (optionally in real time)"""
+
+    def __init__(self, path, rate, frame_len, realtime=True):
+        pcm = read_wav_pcm(path, rate)
+        lead = np.zeros(int(LEAD_SECONDS * rate), dtype=np.int16)
+        tail = np.zeros(int(TAIL_SECONDS * rate), dtype=np.int16)
+        self.pcm = np.concatenate([lead, pcm, tail])
+        self.frame_len = frame_len
+        self.frame_s = frame_len / rate
+        self.realtime = realtime
+        self.pos = 0
+        self._next = None
+
+    def open(self):
+        self._next = time.monotonic()
+
+    def read(self):
+        if self.pos >= len(self.pcm):
+            return None
+        if self.realtime:
+            self._next += self.frame_s
+            delay = self._next - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        frame = self.pcm[self.pos:self.pos + self.frame_len]
+        self.pos += self.frame_len
+        return frame
+
+    def close(self):
+        pass
+
+
+class StubSTTBackend(STTBackend):
+    """Returns the fixture's reference transcript (.txt next to the .wav)"""
+
+    name = "stub"
+    offline = True
+
+    def __init__(self):
+        self.transcript = None
+
+    def transcribe(self, pcm, rate):
+        return self.transcript
+
+
+class StubTTSBackend(TTSBackend):
+    """Silence of roughly spoken length, so the pipeline runs without a voice engine"""
+
+    name = "stub"
+    voice = "stub"
+
+    async def stream_pcm(self, text, out_rate):
+        yield np.zeros(int(out_rate * 0.06 * len(text)), dtype=np.int16).tobytes()
+
+
+def load_corpus(corpus_dir):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.wav"))):
+        txt = os.path.splitext(path)[0] + ".txt"
+        reference = None
+        if os.path.exists(txt):
+            with open(txt, 'r', encoding='utf-8') as f:
+                reference = f.read().strip()
+        fixtures.append((path, reference))
+    return fixtures
+
+
+class SpeechCapture:
+    """Stands in for speech output, MQTT and the robot so the real intent stages run without side effects"""
+
+    def __init__(self):
+        self.spoken = []
+        self.commands = []
+        speech.say = self.say
+        voice_intents.publish_devices = self.publish_devices
+        robot.send = lambda *args, **kwargs: True
+        # LLM answers are replaced by a placeholder (no ollama during a replay)
+        for stage in intent_router.stages:
+            if stage.name == "llm":
+                stage.handler = self.llm_placeholder
+
+    async def say(self, text, priority=None, deadline=None):
+        self.spoken.append(text)
+        return True
+
+    def publish_devices(self, commands):
+        self.commands.extend(commands)
+        return True
+
+    async def llm_placeholder(self, text, _):
+        await self.say(AI_PLACEHOLDER)
+
+    def reset(self):
+        self.spoken = []
+        self.commands = []
+        early_intent.reset()
+
+
+def reply_for(text, capture):
+    """(stage, device commands, spoken reply) from the voice loop's intent router"""
+    capture.reset()
+    stage, _ = asyncio.run(intent_router.route(text))
+    return stage, list(capture.commands), " ".join(capture.spoken)
+
+
+async def first_audio(tts_router, text):
+    t0 = time.monotonic()
+    async for _backend, _chunk in tts_router.stream(text, TTS_OUTPUT_RATE):
+        return time.monotonic() - t0
+    return None
+
+
+def run_fixture(path, reference, stt_router, stub_stt, tts_router, capture, realtime):
+    stub_stt.transcript = reference
+    mic = MicCapture(rate=MIC_RATE, source=WavSource(path, MIC_RATE, int(MIC_RATE * FRAME_MS / 1000), realtime))
+    mic.start()
+    result = {"file": os.path.basename(path), "reference": reference}
+
+    pcm = mic.get_utterance(timeout=LEAD_SECONDS + 5, phrase_time_limit=8)
+    endpoint_at = time.monotonic()
+    mic.stop()
+    if pcm is None or not len(pcm):
+        result["error"] = "no speech detected"
+        return result
+    record = vad.recent_utterances[-1]
+    result["vad_endpoint"] = record["endpoint_latency_ms"]
+    result["utterance_s"] = round(len(pcm) / mic.rate, 2)
+
+    t0 = time.monotonic()
+    text = stt_router.transcribe(pcm, mic.rate)
+    result["stt"] = round((time.monotonic() - t0) * 1000, 1)
+    result["transcript"] = text
+    if not text:
+        result["error"] = "no transcript"
+        return result
+
+    t0 = time.monotonic()
+    stage, commands, reply = reply_for(text, capture)
+    result["intent"] = round((time.monotonic() - t0) * 1000, 1)
+    result["stage"] = stage
+    result["commands"] = [list(c) for c in commands]
+    if reference is not None:
+        # every command of a multi-device sentence must come through, in order
+        result["intent_ok"] = parse_device_commands(reference) == commands
+    if not reply:
+        result["error"] = "no reply"
+        return result
+
+    ttfa = asyncio.run(first_audio(tts_router, reply))
+    result["tts_first_audio"] = None if ttfa is None else round(ttfa * 1000, 1)
+    # speech end = last speech frame; endpoint latency is already measured from there
+    result["speech_end_to_audio"] = round(
+        (result["vad_endpoint"] or 0) + (time.monotonic() - endpoint_at) * 1000, 1
+    )
+    return result
+
+
+def percentiles(values):
+    if not values:
+        return None
+    arr = np.array(values, dtype=np.float64)
+    return {
+        "count": len(values),
+        "p50": round(float(np.percentile(arr, 50)), 1),
+        "p90": round(float(np.percentile(arr, 90)), 1),
+        "p99": round(float(np.percentile(arr, 99)), 1),
+        "max": round(float(arr.max()), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay WAV fixtures through the voice pipeline")
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS, help="folder of *.wav (+ optional *.txt transcripts)")
+    parser.add_argument("--stt", choices=["stub", "vosk", "google"], default="stub")
+    parser.add_argument("--tts", choices=["stub", "piper", "espeak"], default="stub")
+    parser.add_argument("--fast", action="store_true", help="do not pace audio in real time")
+    parser.add_argument("--out", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    fixtures = load_corpus(args.corpus)
+    if not fixtures:
+        print(f"❌ Không có file WAV trong {args.corpus}")
+        return 1
+
+    stub_stt = StubSTTBackend()
+    stt_backend = {"stub": stub_stt, "vosk": VoskBackend(), "google": GoogleSTTBackend()}[args.stt]
+    stt_router = STTRouter([stt_backend], preferred=stt_backend.name)
+    stt_router.prepare()
+    tts_backend = {"stub": StubTTSBackend(), "piper": PiperBackend(), "espeak": EspeakBackend()}[args.tts]
+    tts_router = TTSRouter([tts_backend])
+    tts_router.prepare()
+    if not stt_router.backends or not tts_router.backends:
+        print("❌ Backend STT/TTS đã chọn không khả dụng trên máy này")
+        return 1
+
+    capture = SpeechCapture()
+    results = []
+    for path, reference in fixtures:
+        result = run_fixture(path, reference, stt_router, stub_stt, tts_router, capture, not args.fast)
+        results.append(result)
+        status = result.get("error") or f"'{result['transcript']}' -> {result['stage']} {result['commands']}"
+        print(f"{result['file']:<28} {status}")
+
+    summary = {stage: percentiles([r[stage] for r in results if r.get(stage) is not None]) for stage in STAGES}
+    checked = [r["intent_ok"] for r in results if "intent_ok" in r]
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "stt": args.stt,
+        "tts": args.tts,
+        "realtime": not args.fast,
+        "fixtures": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        "intent_accuracy": round(sum(checked) / len(checked), 3) if checked else None,
+        "stages_ms": summary,
+        "results": results,
+    }
+
+    print("=" * 60)
+    for stage, stats in summary.items():
+        if stats:
+            print(f"{stage:<20} p50 {stats['p50']:7.1f} | p90 {stats['p90']:7.1f} | p99 {stats['p99']:7.1f} ms")
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Kết quả: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import os
+import random
+import sys
+from collections import Counter
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(os.path.dirname(CURRENT_DIR), "asset")
+sys.path.append(ASSET_DIR)
+
+import intent_classifier as ic
+
+# Huấn luyện lại bộ phân loại ý định từ intents.json + transcripts.jsonl đã gán nhãn
+FOLDS = 5
+
+
+def cross_validate(texts, labels):
+    """k-fold accuracy and per-intent misses"""
+    order = list(range(len(texts)))
+    random.Random(0).shuffle(order)
+    correct, misses = 0, Counter()
+    for k in range(FOLDS):
+        test = set(order[k::FOLDS])
+        train_idx = [i for i in order if i not in test]
+        model = ic.IntentClassifier().fit([texts[i] for i in train_idx], [labels[i] for i in train_idx])
+        for i in test:
+            label, _ = model.predict(texts[i])
+            if label == labels[i]:
+                correct += 1
+            else:
+                misses[f"{labels[i]} -> {label}"] += 1
+    return correct / len(texts), misses
+
+
+def main():
+    intents = ic.load_intents()
+    texts, labels = ic.training_data(intents)
+    logged = len(ic.load_logged_examples())
+    print(f"{len(texts)} examples ({logged} from {os.path.basename(ic.TRANSCRIPT_LOG)}), {len(intents)} intents")
+
+    accuracy, misses = cross_validate(texts, labels)
+    print(f"{FOLDS}-fold accuracy: {accuracy * 100:.1f}%")
+    for pair, n in misses.most_common(10):
+        print(f"  {pair}: {n}")
+
+    ic.train()
+    print(f"Đã lưu {ic.MODEL_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -47,22 +47,14 @@ void setup_wifi() {
   }
 }
 
-// ====== MQTT Message Callback ======
-void callback(char* topic, byte* payload, unsigned int length) {
-  String msg;
-  msg.reserve(length);
-  for (unsigned int i = 0; i < length; i++) msg += (char)payload[i];
-
-  msg.trim();
-  Serial.print("MQTT cmd received: ");
-  Serial.println(msg);
-
-  // Format expected: "relayNumber:state", e.g. "1:on"
-  int sep = msg.indexOf(':');
+// ====== Apply one "relayNumber:state" command ======
+void applyCommand(const String& cmd) {
+  int sep = cmd.indexOf(':');
   if (sep == -1) return;
 
-  int relayNum = msg.substring(0, sep).toInt();
-  String state = msg.substring(sep + 1);
+  int relayNum = cmd.substring(0, sep).toInt();
+  String state = cmd.substring(sep + 1);
+  state.trim();
 
   int pin = -1;
   if (relayNum == 1) pin = RELAY1_PIN;
@@ -82,6 +74,29 @@ void callback(char* topic, byte* payload, unsigned int length) {
   }
 }
 
+// ====== MQTT Message Callback ======
+void callback(char* topic, byte* payload, unsigned int length) {
+  String msg;
+  msg.reserve(length);
+  for (unsigned int i = 0; i < length; i++) msg += (char)payload[i];
+
+  msg.trim();
+  Serial.print("MQTT cmd received: ");
+  Serial.println(msg);
+
+  // Format expected: "relayNumber:state", e.g. "1:on"
+  // or a batch applied in one go: "1:on,2:on,3:off"
+  int start = 0;
+  while (start < (int)msg.length()) {
+    int comma = msg.indexOf(',', start);
+    if (comma == -1) comma = msg.length();
+    String cmd = msg.substring(start, comma);
+    cmd.trim();
+    applyCommand(cmd);
+    start = comma + 1;
+  }
+}
+
 // ====== MQTT Reconnect ======
 void reconnect() {
   while (!client.connected()) {
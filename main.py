@@ -4,7 +4,6 @@ import time
 import sys
 import os
 from dotenv import load_dotenv
-import ollama
 
 load_dotenv()
 
@@ -13,12 +12,18 @@ ASSET_DIR = os.path.join(CURRENT_DIR, "asset")
 sys.path.append(ASSET_DIR)
 
 import globals
-from system_logs import load_system_config, load_system_logs, add_system_log
-from ai_module import speak, listen, check_info_request, analyze_command_similarity, LOCAL_MODEL, SYS_INSTRUCT_BASE
+from system_logs import load_system_config, load_system_logs
+from ai_module import listen, warm_tts_cache, warm_stt, speak_sentences, model_manager, GREETING_TEXT
+from voice_intents import intent_router, early_intent
+from intent_router import STOP
+from intent_classifier import intent_responder, log_transcript
+from speech_scheduler import speech, PRIORITY_ACK
 from camera_tracking import camera_thread
 from bluetooth_server import bluetooth_server_thread
 from routes import app
-from mqtt_handler import mqtt_client, TOPIC_CMD
+from weather_provider import weather
+from news_poller import news
+from http_client import http
 
 print("🔥 NEW VERSION LOADED @", time.strftime("%H:%M:%S"))
 
@@ -43,8 +48,20 @@ def start_camera(delay=3):
 
 async def main_loop():
     await asyncio.sleep(3)
+    # render fixed acks in the background so they play instantly later
+    warm_task = asyncio.create_task(warm_tts_cache())
+    stt_task = asyncio.create_task(warm_stt())
+    # read (or retrain) the intent model off the event loop, not at import
+    intent_task = asyncio.get_running_loop().run_in_executor(None, intent_responder.load)
+    # load LOCAL_MODEL now so the first question does not wait for it
+    model_manager.start()
+    # weather (default + recent cities) and news headlines stay fresh in the background
+    weather.start()
+    news.start()
+    # every producer speaks through the scheduler
+    speech.start(speak_sentences)
     try:
-        await speak("Hanah khởi động")
+        await speech.say(GREETING_TEXT, PRIORITY_ACK)
     except Exception as e:
         print(f"Greeting failed: {e}")
 
@@ -53,70 +70,34 @@ async def main_loop():
     while not globals.STOP_EVENT.is_set():
         try:
             # call blocking listen() in executor
-            user_input = await loop.run_in_executor(None, listen)
+            early_intent.reset()
+            user_input = await loop.run_in_executor(None, listen, early_intent.on_partial)
 
             if not user_input:
+                early_intent.reconcile([])
                 # small sleep to yield CPU
                 await asyncio.sleep(0.1)
                 continue
 
             print(f"👤: {user_input}")
 
-            # exit phrase
-            if "tạm biệt" in user_input.lower():
-                await speak("Bai bai.")
+            intent_responder.last = None
+            stage, result = await intent_router.route(user_input)
+            label, confidence = intent_responder.last or (None, None)
+            log_transcript(user_input, stage, label, confidence)
+            if stage != "devices":
+                # an early command that the final transcript no longer contains
+                early_intent.reconcile([])
+            if result == STOP:
                 break
 
-            # 1) Device control via language
-            cmd = analyze_command_similarity(user_input)
-            if cmd:
-                device_id, cmd_state = cmd
-                try:
-                    # MQTT publish (paho is thread-safe for publish)
-                    mqtt_client.publish(TOPIC_CMD, f"{device_id}:{cmd_state}")
-                    add_system_log(f"Gửi lệnh MQTT: Thiết bị {device_id} -> {cmd_state.upper()}", "info", "MQTT_CMD")
-                except Exception as e:
-                    print(f"MQTT publish error: {e}")
-
-                action_vn = 'bật' if cmd_state == 'on' else 'tắt'
-                await speak(f"Đã {action_vn} đèn {device_id}!")
-                continue
-
-            # 2) Info requests (time/weather)
-            info = check_info_request(user_input)
-            if info:
-                await speak(info)
-                continue
-
-            # 3) AI conversation (ollama.chat is blocking => run in executor)
-            if globals.SYSTEM_CONFIG.get("ai", True):
-                try:
-                    res = await loop.run_in_executor(None, lambda: ollama.chat(
-                        model=LOCAL_MODEL,
-                        messages=[
-                            {'role': 'system', 'content': SYS_INSTRUCT_BASE},
-                            {'role': 'user', 'content': user_input}
-                        ]
-                    ))
-                    # extract text robustly
-                    ai_text = None
-                    try:
-                        ai_text = res['message']['content']
-                    except Exception:
-                        if isinstance(res, str):
-                            ai_text = res
-                        elif isinstance(res, dict) and 'content' in res:
-                            ai_text = res['content']
-                    if ai_text:
-                        await speak(ai_text)
-                except Exception as e:
-                    print(f"AI chat error: {e}")
-                    await asyncio.sleep(0.5)
-
         except Exception as e:
             print(f"main_loop error: {e}")
             await asyncio.sleep(0.5)
 
+    # release pooled keep-alive connections
+    await http.close()
+
 if __name__ == "__main__":
     globals.SYSTEM_CONFIG = load_system_config()
     globals.SYSTEM_LOGS = load_system_logs()